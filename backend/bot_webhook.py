@@ -4,14 +4,22 @@ Telegram Bot with Webhook support for Railway deployment.
 Uses FastAPI for native async support.
 """
 import os
-import json
+import asyncio
+import secrets
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
+from operator import itemgetter
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.ext import AIORateLimiter, Application, MessageHandler, filters, ContextTypes
+from telegram.helpers import escape_markdown
 
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
@@ -20,14 +28,41 @@ sys.path.insert(0, os.path.dirname(__file__))
 load_dotenv()
 
 import logging
+
+
+class _JsonFormatter(logging.Formatter):
+    """One JSON object per record (LOG_FORMAT=json) for log aggregators."""
+    
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+_log_handler = logging.StreamHandler()
+if os.getenv("LOG_FORMAT", "").lower() == "json":
+    _log_handler.setFormatter(_JsonFormatter())
+else:
+    _log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+    handlers=[_log_handler],
+    level=os.getenv("LOG_LEVEL", "INFO").upper()
 )
 logger = logging.getLogger(__name__)
 # ===== Now logger is available for all import error handlers below =====
 
-from sentiment_analyzer import analyze_sentiment
+from sentiment_analyzer import analyze_sentiment_async
+
+try:
+    from backend.http_client import close_http_client, get_http_client
+except ImportError:
+    from http_client import close_http_client, get_http_client
 
 # Global DB Status
 DB_AVAILABLE = False
@@ -42,9 +77,17 @@ except ImportError:
     import redis_storage
 
 try:
-    from backend.crypto_prices import format_price, get_crypto_price, is_symbol_supported
+    from backend.crypto_prices import (
+        format_price, get_crypto_price_async, get_multiple_prices_async, is_symbol_supported,
+        SUPPORTED_SYMBOLS, SUPPORTED_SYMBOLS_TEXT,
+    )
 except ImportError:
-    from crypto_prices import format_price, get_crypto_price, is_symbol_supported
+    from crypto_prices import (
+        format_price, get_crypto_price_async, get_multiple_prices_async, is_symbol_supported,
+        SUPPORTED_SYMBOLS, SUPPORTED_SYMBOLS_TEXT,
+    )
+
+_SUPPORTED_CRYPTOS_HINT = "Supported cryptos: " + SUPPORTED_SYMBOLS_TEXT
 
 try:
     from article_scraper import extract_article, extract_urls
@@ -52,6 +95,22 @@ except ImportError:
     def extract_article(url): return None
     def extract_urls(text): return []
 
+def _find_urls(text):
+    """extract_urls() with a cheap substring check first (most messages have no link)."""
+    if 'http' not in text:
+        return []
+    return extract_urls(text)
+
+# Article scraping is blocking (HTTP + HTML parsing); run it off the event loop
+SCRAPER_MAX_WORKERS = 8
+_scraper_executor = ThreadPoolExecutor(max_workers=SCRAPER_MAX_WORKERS, thread_name_prefix="scraper")
+
+# asyncio.to_thread() runs on the loop's default executor, which is sized
+# min(32, CPUs + 4): only 5-6 threads on a small container. Handlers park
+# there on Redis and CoinGecko I/O, not CPU, so size it for concurrency.
+BLOCKING_MAX_WORKERS = int(os.getenv('BLOCKING_MAX_WORKERS', 32))
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_MAX_WORKERS, thread_name_prefix="blocking")
+
 # Feature 4: AI Recommendations handler
 try:
     from backend.recommend_handler import recommend_command as recommend_handler_fn
@@ -107,9 +166,7 @@ try:
     from backend.routes.analytics import router as analytics_router
     ANALYTICS_AVAILABLE = True
 except ImportError as e:
-    logger.error(f"❌ Analytics import error: {e}")
-    import traceback
-    logger.error(f"Full traceback:\n{traceback.format_exc()}")
+    logger.exception("❌ Analytics import error: %s", e)
     logger.warning("⚠️ Analytics system not available")
     ANALYTICS_AVAILABLE = False
     def init_analytics(): return False
@@ -129,11 +186,40 @@ except ImportError:
 
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+# Registered as Telegram's secret_token; optional so existing deployments keep working
+TG_WEBHOOK_SECRET = os.getenv('TG_WEBHOOK_SECRET') or None
 PORT = int(os.getenv('PORT', 8080))
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+# Dashboard assets, legal pages and analytics JSON; webhook acks stay under the threshold
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 application = None
 
+# Webhook updates are acknowledged immediately and processed in the background.
+# The semaphore caps how many updates are in flight at once; the backlog
+# cap bounds how many may wait behind them before Telegram is told to retry.
+MAX_CONCURRENT_UPDATES = 256
+MAX_PENDING_UPDATES = 1000
+_update_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPDATES)
+_background_tasks = set()
+
+# Outgoing Bot API calls are throttled below Telegram's ~30 msg/s global
+# limit so bursts queue locally instead of coming back as 429s
+TELEGRAM_MAX_SENDS_PER_SECOND = 25
+TELEGRAM_SEND_MAX_RETRIES = 2
+
+# Updates from the same chat run one at a time, in arrival order, so a
+# slow /mydata never lets a later /add overtake it. Locks are dropped as
+# soon as no task of that chat holds or waits on them.
+_chat_locks = weakref.WeakValueDictionary()
+
+# Plain text messages (no commands) go to the free-text analysis handler
+TEXT_NON_COMMAND = filters.TEXT & ~filters.COMMAND
+# Same updates CommandHandler accepts by default (new and edited messages, no channel posts)
+COMMAND_MESSAGES = filters.COMMAND & filters.UpdateType.MESSAGES
+# Only the update types the handlers above can match; Telegram doesn't send the rest
+WEBHOOK_ALLOWED_UPDATES = [Update.MESSAGE, Update.EDITED_MESSAGE]
+
 # Include Stripe Webhook Router
 if STRIPE_WEBHOOK_AVAILABLE and stripe_webhook_router:
     app.include_router(stripe_webhook_router)
@@ -155,12 +241,8 @@ if ADMIN_AVAILABLE and admin_router:
 else:
     logger.warning("⚠️ Admin dashboard router NOT registered")
 
-# Command handlers
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user = update.effective_user
-    
-    welcome_text = f"""👋 **Welcome {user.first_name}!**
-
+# Static /start and /help texts, built once at import (only the greeting varies)
+WELCOME_TAIL = """
 🤖 **CryptoSentinel AI**
 Your AI-powered crypto assistant
 
@@ -218,23 +300,15 @@ Your AI-powered crypto assistant
 
 ──────────────────
 📈 **Supported Cryptos**
-BTC, ETH, SOL, BNB, XRP, ADA, AVAX, DOT, MATIC, LINK, UNI, ATOM, LTC, BCH, XLM
+""" + SUPPORTED_SYMBOLS_TEXT + """
 
 📊 Data: [CoinGecko](https://coingecko.com) + [Perplexity AI](https://perplexity.ai)
 📄 [Terms](https://sentiment-trading-bot-production.up.railway.app/terms) | [Privacy](https://sentiment-trading-bot-production.up.railway.app/privacy)
 
 _Type `/help` for detailed guide with Free limits_
 """
-    await update.message.reply_text(welcome_text, parse_mode='Markdown', disable_web_page_preview=True)
-    
-    # Track registration (Phase 1.5 Analytics)
-    if ANALYTICS_AVAILABLE:
-        track_registration(user.id, user.username)
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    
-    help_text = """📚 **Complete User Guide**
+HELP_TEXT = """📚 **Complete User Guide**
 
 🆓 **FREE vs 💎 PREMIUM**
 
@@ -343,7 +417,7 @@ _FREE: 3/week (resets Monday) | Premium: Unlimited_
 ──────────────────
 📈 **SUPPORTED CRYPTOS**
 
-BTC, ETH, SOL, BNB, XRP, ADA, AVAX, DOT, MATIC, LINK, UNI, ATOM, LTC, BCH, XLM
+""" + SUPPORTED_SYMBOLS_TEXT + """
 
 ──────────────────
 ⚠️ **DISCLAIMER**
@@ -358,7 +432,37 @@ This bot provides informational services ONLY.
 
 _Back to main menu: `/start`_
 """
-    await update.message.reply_text(help_text, parse_mode='Markdown', disable_web_page_preview=True)
+
+# Rendered /portfolio and /summary replies, reused when a user re-sends the same
+# command within a few seconds. Dropped as soon as the user's positions change.
+REPLY_CACHE_TTL_SECONDS = 3
+_reply_cache = TTLCache(maxsize=4096, ttl=REPLY_CACHE_TTL_SECONDS)
+
+def _invalidate_reply_cache(user_id: int):
+    """Forget cached portfolio replies after the user's positions change."""
+    _reply_cache.pop((user_id, 'portfolio'), None)
+    _reply_cache.pop((user_id, 'summary'), None)
+
+async def _reply(message, text, **kwargs):
+    """Reply in Markdown with link previews disabled (all bot replies are informational)."""
+    return await message.reply_text(text, parse_mode='Markdown', disable_web_page_preview=True, **kwargs)
+
+# Command handlers
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    
+    # Escaped so a name like "john_doe" can't make Telegram reject the Markdown
+    name = escape_markdown(user.first_name or "", version=1)
+    await _reply(update.message, f"👋 **Welcome {name}!**\n{WELCOME_TAIL}")
+    
+    # Track registration (Phase 1.5 Analytics)
+    if ANALYTICS_AVAILABLE:
+        track_registration(user.id, user.username)
+
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    
+    await _reply(update.message, HELP_TEXT)
     
     # Track help command (Phase 1.5 Analytics)
     if ANALYTICS_AVAILABLE:
@@ -367,20 +471,21 @@ _Back to main menu: `/start`_
 @check_rate_limit
 async def analyze_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
+    msg = update.message
     user_text = ' '.join(context.args)
     
     if not user_text or len(user_text) < 10:
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "⚠️ Please provide text to analyze.\n\n"
             "**Examples:**\n"
             "`/analyze Bitcoin surges as ETFs see record inflows`\n"
-            "`/analyze Ethereum merge completes successfully`",
-            parse_mode='Markdown'
+            "`/analyze Ethereum merge completes successfully`"
         )
         return
     
     try:
-        urls = extract_urls(user_text)
+        urls = _find_urls(user_text)
         if urls:
             await analyze_url(update, urls[0])
         else:
@@ -391,88 +496,244 @@ async def analyze_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             track_command('analyze', user_id, success=True)
     
     except Exception as e:
-        logger.error(f"❌ /analyze error: {e}")
+        logger.exception("❌ /analyze error: %s", e)
         # Track failed command
         if ANALYTICS_AVAILABLE:
             track_command('analyze', user_id, success=False, error=str(e))
         raise
 
+# Usage messages for malformed command arguments
+_ADD_USAGE = (
+    "⚠️ **Usage:** `/add <symbol> <quantity> <price>`\n\n"
+    "**Examples:**\n"
+    "`/add BTC 0.5 45000` - Buy 0.5 BTC at $45,000\n"
+    "`/add ETH 10 2500` - Buy 10 ETH at $2,500"
+)
+
+_REMOVE_USAGE = (
+    "⚠️ **Usage:** `/remove <symbol> [quantity]`\n\n"
+    "**Examples:**\n"
+    "`/remove BTC` - Remove all BTC\n"
+    "`/remove BTC 0.5` - Remove only 0.5 BTC"
+)
+
+_SELL_USAGE = (
+    "⚠️ **Usage:** `/sell <symbol> <quantity> <sell_price>`\n\n"
+    "**Examples:**\n"
+    "`/sell BTC 0.5 75000` - Sell 0.5 BTC at $75,000\n"
+    "`/sell ETH 5 3500` - Sell 5 ETH at $3,500\n\n"
+    "💡 Automatically records realized P&L for tracking"
+)
+
+_SETALERT_USAGE = (
+    "⚠️ **Usage:** `/setalert <symbol> <tp|sl> <price>`\n\n"
+    "**Examples:**\n"
+    "`/setalert BTC tp 100000` - Take Profit at $100k\n"
+    "`/setalert BTC sl 40000` - Stop Loss at $40k\n"
+    "`/setalert ETH tp 5000` - Take Profit ETH at $5k\n\n"
+    "💡 **You can set BOTH TP and SL independently**"
+)
+
+_REMOVEALERT_USAGE = (
+    "⚠️ **Usage:** `/removealert <symbol>`\n\n"
+    "**Example:** `/removealert BTC`\n\n"
+    "This will remove BOTH TP and SL alerts for the crypto."
+)
+
+async def _parse_trade_args(msg, args, usage):
+    """Parse `<symbol> <quantity> <price>` for /add and /sell.
+    
+    Replies with the usage or validation error and returns None on bad
+    input; otherwise returns (SYMBOL, quantity, price).
+    """
+    if len(args) != 3:
+        await _reply(msg, usage)
+        return None
+    
+    try:
+        quantity = float(args[1])
+        price = float(args[2])
+    except ValueError:
+        await _reply(msg, "❌ Quantity and price must be numbers.")
+        return None
+    
+    if quantity <= 0 or price <= 0:
+        await _reply(msg, "❌ Values must be positive.")
+        return None
+    
+    return args[0].upper(), quantity, price
+
+# The checkout URL is per Stripe session, so only the label is constant
+_SUBSCRIBE_BUTTON_TEXT = "🔥 Subscribe Now - €9/month"
+
+_DB_OFFLINE_MSG = (
+    "⚠️ **Database Unavailable**\n\n"
+    "The database is currently offline or connecting.\n"
+    "Please try again in a few minutes.\n\n"
+    "You can still use `/analyze` for sentiment!"
+)
+
+_EMPTY_PORTFOLIO_MSG = (
+    "💼 **Your Crypto Portfolio**\n\n"
+    "_Your portfolio is empty._\n\n"
+    "**Add positions with:**\n"
+    "`/add BTC 0.5 45000`\n"
+    "`/add ETH 10 2500`\n\n"
+    "**Supported cryptos:**\n"
+    + SUPPORTED_SYMBOLS_TEXT
+)
+
+_EMPTY_ALERTS_MSG = (
+    "🔔 **Your Price Alerts**\n\n"
+    "_You have no active alerts._\n\n"
+    "**Set alerts with:**\n"
+    "`/setalert BTC tp 100000`\n"
+    "`/setalert BTC sl 40000`"
+)
+
+_ALERTS_FOOTER = (
+    "\n\n_Alerts checked every 15 minutes_\n"
+    "_Remove with `/removealert <SYMBOL>`_"
+)
+
+_MYDATA_CAPTION = (
+    "📦 **Your Data Export (GDPR)**\n\n"
+    "This file contains ALL your data stored in CryptoSentinel AI:\n"
+    "• Profile\n"
+    "• Portfolio positions\n"
+    "• Price alerts\n"
+    "• Transaction history\n"
+    "• Realized P&L records\n\n"
+    "_This is your RIGHT TO ACCESS under GDPR Article 15._\n\n"
+    "📄 [Privacy Policy](https://sentiment-trading-bot-production.up.railway.app/privacy)"
+)
+
+_DELETEDATA_CONFIRM_PROMPT = (
+    "⚠️ **DELETE ALL YOUR DATA?**\n\n"
+    "This will PERMANENTLY delete:\n"
+    "• Your profile\n"
+    "• All portfolio positions\n"
+    "• All price alerts\n"
+    "• Transaction history\n"
+    "• Realized P&L records\n\n"
+    "**⚠️ THIS CANNOT BE UNDONE!**\n\n"
+    "To confirm, send:\n"
+    "`/deletedata CONFIRM`\n\n"
+    "_This is your RIGHT TO ERASURE under GDPR Article 17._"
+)
+
+_DELETEDATA_DONE_MSG = (
+    "✅ **DATA DELETED**\n\n"
+    "All your data has been permanently deleted from CryptoSentinel AI.\n\n"
+    "This includes:\n"
+    "• Profile\n"
+    "• Portfolio positions\n"
+    "• Price alerts\n"
+    "• Transaction history\n"
+    "• Realized P&L\n\n"
+    "You can start fresh anytime with `/start`.\n\n"
+    "Thank you for using CryptoSentinel AI. 👋"
+)
+
+# P&L sign -> emoji, indexed by (x > 0) - (x < 0) + 1
+_SIGN_EMOJI = ("🔴", "⚪", "🟢")
+
+# Transaction action -> emoji for /history
+_ACTION_EMOJI = {
+    "BUY": "🟢",
+    "SELL": "🔵",
+    "REMOVE": "❌",
+    "PARTIAL_REMOVE": "⚠️"
+}
+
+# Unpacks the fields a /portfolio row needs from a position dict in one call
+_position_fields = itemgetter(
+    "quantity", "avg_price", "current_price", "current_value", "pnl_usd", "pnl_percent"
+)
+
+# One /portfolio position block, rendered with a single format call per row
+_format_position_row = (
+    "\n**{symbol}** {emoji}\n"
+    "  • Quantity: `{qty:.8g}`\n"
+    "  • Avg Price: `{avg}`\n"
+    "  • Current: `{current}`\n"
+    "  • Value: `{value}`\n"
+    "  • P&L: `{pnl}`"
+).format
+
 async def portfolio_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Display user's crypto portfolio holdings with current prices."""
-    user_id = update.effective_user.id
-    username = update.effective_user.username or update.effective_user.first_name or "User"
+    eu = update.effective_user
+    user_id = eu.id
+    username = eu.username or eu.first_name or "User"
+    msg = update.message
     
-    if not DB_AVAILABLE:
-        await update.message.reply_text(
-            "⚠️ **Database Unavailable**\n\n"
-            "The database is currently offline or connecting.\n"
-            "Please try again in a few minutes.\n\n"
-            "You can still use `/analyze` for sentiment!",
-            parse_mode='Markdown'
-        )
+    logger.info("💼 /portfolio called by user %s (@%s)", user_id, username)
+    
+    cached = _reply_cache.get((user_id, 'portfolio'))
+    if cached is not None:
+        await _reply(msg, cached)
         if ANALYTICS_AVAILABLE:
-            track_command('portfolio', user_id, success=False, error='db_offline')
+            track_command('portfolio', user_id, success=True)
         return
     
-    logger.info(f"💼 /portfolio called by user {user_id} (@{username})")
-    
     try:
-        portfolio = portfolio_manager.get_portfolio_with_prices(user_id, username)
+        portfolio = await portfolio_manager.get_portfolio_with_prices_async(user_id, username)
         
         if not portfolio["positions"]:
-            response = "💼 **Your Crypto Portfolio**\n\n"
-            response += "_Your portfolio is empty._\n\n"
-            response += "**Add positions with:**\n"
-            response += "`/add BTC 0.5 45000`\n"
-            response += "`/add ETH 10 2500`\n\n"
-            response += "**Supported cryptos:**\n"
-            response += "BTC, ETH, SOL, BNB, XRP, ADA, AVAX, DOT, MATIC, LINK, UNI, ATOM, LTC, BCH, XLM"
+            response = _EMPTY_PORTFOLIO_MSG
+            _reply_cache[(user_id, 'portfolio')] = response
         else:
-            response = "💼 **Your Crypto Portfolio**\n"
-            response += "_Prices updated in real-time via CoinGecko_\n"
+            parts = [
+                "💼 **Your Crypto Portfolio**\n",
+                "_Prices updated in real-time via CoinGecko_\n",
+            ]
             
+            append = parts.append
+            all_priced = True
             for symbol, pos in portfolio["positions"].items():
-                qty = pos["quantity"]
-                avg_price = pos["avg_price"]
-                current_price = pos["current_price"]
-                current_value = pos["current_value"]
-                pnl_usd = pos["pnl_usd"]
-                pnl_percent = pos["pnl_percent"]
+                qty, avg_price, current_price, current_value, pnl_usd, pnl_percent = _position_fields(pos)
                 
-                pnl_emoji = "🟢" if pnl_percent > 0 else ("🔴" if pnl_percent < 0 else "⚪")
+                pnl_emoji = _SIGN_EMOJI[(pnl_percent > 0) - (pnl_percent < 0) + 1]
                 
                 if current_price is None or current_price == 0:
                     price_display = "n/a (price feed error)"
                     pnl_display = "n/a"
+                    all_priced = False
                 else:
                     price_display = format_price(current_price)
                     pnl_display = f"{pnl_usd:+,.2f} USD ({pnl_percent:+.2f}%)"
                 
-                response += f"\n**{symbol}** {pnl_emoji}\n"
-                response += f"  • Quantity: `{qty:.8g}`\n"
-                response += f"  • Avg Price: `{format_price(avg_price)}`\n"
-                response += f"  • Current: `{price_display}`\n"
-                response += f"  • Value: `{format_price(current_value) if current_value else 'n/a'}`\n"
-                response += f"  • P&L: `{pnl_display}`"
+                append(_format_position_row(
+                    symbol=symbol,
+                    emoji=pnl_emoji,
+                    qty=qty,
+                    avg=format_price(avg_price),
+                    current=price_display,
+                    value=format_price(current_value) if current_value else 'n/a',
+                    pnl=pnl_display,
+                ))
             
-            response += f"\n\n**Total Value:** `{format_price(portfolio['total_current_value'])}`"
-            response += "\n\n_Prices by CoinGecko_"
+            parts.append(f"\n\n**Total Value:** `{format_price(portfolio['total_current_value'])}`")
+            parts.append("\n\n_Prices by CoinGecko_")
+            response = "".join(parts)
+            if all_priced:
+                # A render with a missing price isn't reused; the next tap retries the feed
+                _reply_cache[(user_id, 'portfolio')] = response
         
-        await update.message.reply_text(response, parse_mode='Markdown', disable_web_page_preview=True)
-        logger.info(f"✅ /portfolio response sent to {user_id}")
+        await _reply(msg, response)
+        logger.info("✅ /portfolio response sent to %s", user_id)
         
         # Track successful portfolio command
         if ANALYTICS_AVAILABLE:
             track_command('portfolio', user_id, success=True)
         
     except Exception as e:
-        logger.error(f"❌ /portfolio error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ /portfolio error: %s", e)
         
-        await update.message.reply_text(
-            "❌ **Error**\n\nSomething went wrong with the database. Please try again.",
-            parse_mode='Markdown'
+        await _reply(
+            msg,
+            "❌ **Error**\n\nSomething went wrong with the database. Please try again."
         )
         
         # Track failed command
@@ -481,65 +742,48 @@ async def portfolio_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 @check_position_limit
 async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    username = update.effective_user.username or update.effective_user.first_name
+    eu = update.effective_user
+    user_id = eu.id
+    username = eu.username or eu.first_name
+    msg = update.message
     
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline. Cannot add position.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('add', user_id, success=False, error='db_offline')
-        return
-    
-    if len(context.args) != 3:
-        await update.message.reply_text(
-            "⚠️ **Usage:** `/add <symbol> <quantity> <price>`\n\n"
-            "**Examples:**\n"
-            "`/add BTC 0.5 45000` - Buy 0.5 BTC at $45,000\n"
-            "`/add ETH 10 2500` - Buy 10 ETH at $2,500",
-            parse_mode='Markdown'
-        )
+    parsed = await _parse_trade_args(msg, context.args, _ADD_USAGE)
+    if parsed is None:
         return
-    
-    symbol = context.args[0].upper()
+    symbol, quantity, price = parsed
     
     try:
-        quantity = float(context.args[1])
-        price = float(context.args[2])
-    except ValueError:
-        await update.message.reply_text("❌ Quantity and price must be numbers.", parse_mode='Markdown')
-        return
-    
-    if quantity <= 0 or price <= 0:
-        await update.message.reply_text("❌ Values must be positive.", parse_mode='Markdown')
-        return
-    
-    try:
-        result = portfolio_manager.add_position(user_id, symbol, quantity, price, username)
-        current_price = get_crypto_price(symbol)
+        result = await asyncio.to_thread(portfolio_manager.add_position, user_id, symbol, quantity, price, username)
+        _invalidate_reply_cache(user_id)
+        current_price = await get_crypto_price_async(symbol)
         
-        response = f"✅ **Position {result['action'].capitalize()}**\n\n"
-        response += f"**{symbol}**\n"
-        response += f"  • Quantity: `{result['quantity']:.8g}`\n"
-        response += f"  • Avg Price: `{format_price(result['avg_price'])}`\n"
+        parts = [
+            f"✅ **Position {result['action'].capitalize()}**\n\n"
+            f"**{symbol}**\n"
+            f"  • Quantity: `{result['quantity']:.8g}`\n"
+            f"  • Avg Price: `{format_price(result['avg_price'])}`\n"
+        ]
         
         if current_price:
             current_value = result['quantity'] * current_price
             pnl_usd = current_value - (result['quantity'] * result['avg_price'])
             pnl_percent = ((current_price - result['avg_price']) / result['avg_price']) * 100
             
-            response += f"\n📊 **Current Status:**\n"
-            response += f"  • P&L: `{pnl_usd:+,.2f} USD ({pnl_percent:+.2f}%)`"
+            parts.append(
+                f"\n📊 **Current Status:**\n"
+                f"  • P&L: `{pnl_usd:+,.2f} USD ({pnl_percent:+.2f}%)`"
+            )
         
-        await update.message.reply_text(response, parse_mode='Markdown')
-        logger.info(f"✅ /add {symbol} for user {user_id}")
+        await _reply(msg, "".join(parts))
+        logger.info("✅ /add %s for user %s", symbol, user_id)
         
         # Track successful add
         if ANALYTICS_AVAILABLE:
             track_command('add', user_id, success=True)
         
     except Exception as e:
-        logger.error(f"❌ /add error: {e}")
-        await update.message.reply_text(f"❌ Error adding position. Is {symbol} supported?", parse_mode='Markdown')
+        logger.exception("❌ /add error: %s", e)
+        await _reply(msg, f"❌ Error adding position. Is {escape_markdown(symbol)} supported?")
         
         # Track failed add
         if ANALYTICS_AVAILABLE:
@@ -548,21 +792,10 @@ async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Remove position (full or partial)."""
     user_id = update.effective_user.id
-    
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('remove', user_id, success=False, error='db_offline')
-        return
+    msg = update.message
     
     if len(context.args) < 1 or len(context.args) > 2:
-        await update.message.reply_text(
-            "⚠️ **Usage:** `/remove <symbol> [quantity]`\n\n"
-            "**Examples:**\n"
-            "`/remove BTC` - Remove all BTC\n"
-            "`/remove BTC 0.5` - Remove only 0.5 BTC",
-            parse_mode='Markdown'
-        )
+        await _reply(msg, _REMOVE_USAGE)
         return
     
     symbol = context.args[0].upper()
@@ -572,42 +805,47 @@ async def remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             quantity = float(context.args[1])
             if quantity <= 0:
-                await update.message.reply_text("❌ Quantity must be positive.", parse_mode='Markdown')
+                await _reply(msg, "❌ Quantity must be positive.")
                 return
         except ValueError:
-            await update.message.reply_text("❌ Quantity must be a number.", parse_mode='Markdown')
+            await _reply(msg, "❌ Quantity must be a number.")
             return
     
     try:
-        result = portfolio_manager.remove_position(user_id, symbol, quantity)
+        result = await asyncio.to_thread(portfolio_manager.remove_position, user_id, symbol, quantity)
+        _invalidate_reply_cache(user_id)
         
         if not result["success"]:
             error_msg = result.get("error", "Unknown error")
-            await update.message.reply_text(f"⚠️ {error_msg}", parse_mode='Markdown')
+            await _reply(msg, f"⚠️ {escape_markdown(error_msg)}")
             if ANALYTICS_AVAILABLE:
                 track_command('remove', user_id, success=False, error=error_msg)
             return
         
         if result["action"] == "full_remove":
-            response = f"✅ **Position Removed**\n\n"
-            response += f"`{symbol}` fully removed from portfolio.\n"
-            response += f"Quantity removed: `{result['quantity_removed']:.8g}`"
+            response = (
+                f"✅ **Position Removed**\n\n"
+                f"`{symbol}` fully removed from portfolio.\n"
+                f"Quantity removed: `{result['quantity_removed']:.8g}`"
+            )
         else:
-            response = f"✅ **Partial Removal**\n\n"
-            response += f"**{symbol}**\n"
-            response += f"  • Removed: `{result['quantity_removed']:.8g}`\n"
-            response += f"  • Remaining: `{result['quantity_remaining']:.8g}`"
+            response = (
+                f"✅ **Partial Removal**\n\n"
+                f"**{symbol}**\n"
+                f"  • Removed: `{result['quantity_removed']:.8g}`\n"
+                f"  • Remaining: `{result['quantity_remaining']:.8g}`"
+            )
         
-        await update.message.reply_text(response, parse_mode='Markdown')
-        logger.info(f"✅ /remove {symbol} for user {user_id}")
+        await _reply(msg, response)
+        logger.info("✅ /remove %s for user %s", symbol, user_id)
         
         # Track successful remove
         if ANALYTICS_AVAILABLE:
             track_command('remove', user_id, success=True)
         
     except Exception as e:
-        logger.error(f"❌ /remove error: {e}")
-        await update.message.reply_text("❌ Error removing position.", parse_mode='Markdown')
+        logger.exception("❌ /remove error: %s", e)
+        await _reply(msg, "❌ Error removing position.")
         
         # Track failed remove
         if ANALYTICS_AVAILABLE:
@@ -616,74 +854,51 @@ async def remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def sell_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Sell position and record realized P&L."""
     user_id = update.effective_user.id
+    msg = update.message
     
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('sell', user_id, success=False, error='db_offline')
-        return
-    
-    if len(context.args) != 3:
-        await update.message.reply_text(
-            "⚠️ **Usage:** `/sell <symbol> <quantity> <sell_price>`\n\n"
-            "**Examples:**\n"
-            "`/sell BTC 0.5 75000` - Sell 0.5 BTC at $75,000\n"
-            "`/sell ETH 5 3500` - Sell 5 ETH at $3,500\n\n"
-            "💡 Automatically records realized P&L for tracking",
-            parse_mode='Markdown'
-        )
-        return
-    
-    symbol = context.args[0].upper()
-    
-    try:
-        quantity = float(context.args[1])
-        sell_price = float(context.args[2])
-    except ValueError:
-        await update.message.reply_text("❌ Quantity and price must be numbers.", parse_mode='Markdown')
-        return
-    
-    if quantity <= 0 or sell_price <= 0:
-        await update.message.reply_text("❌ Values must be positive.", parse_mode='Markdown')
+    parsed = await _parse_trade_args(msg, context.args, _SELL_USAGE)
+    if parsed is None:
         return
+    symbol, quantity, sell_price = parsed
     
     try:
-        result = portfolio_manager.sell_position(user_id, symbol, quantity, sell_price)
+        result = await asyncio.to_thread(portfolio_manager.sell_position, user_id, symbol, quantity, sell_price)
+        _invalidate_reply_cache(user_id)
         
         if not result["success"]:
             error_msg = result.get("error", "Unknown error")
-            await update.message.reply_text(f"⚠️ {error_msg}", parse_mode='Markdown')
+            await _reply(msg, f"⚠️ {escape_markdown(error_msg)}")
             if ANALYTICS_AVAILABLE:
                 track_command('sell', user_id, success=False, error=error_msg)
             return
         
         pnl = result["pnl_realized"]
-        pnl_emoji = "🟢" if pnl > 0 else ("🔴" if pnl < 0 else "⚪")
-        
-        response = f"{pnl_emoji} **SALE EXECUTED**\n\n"
-        response += f"**{symbol}**\n"
-        response += f"  • Quantity sold: `{result['quantity_sold']:.8g}`\n"
-        response += f"  • Buy price: `{format_price(result['buy_price'])}`\n"
-        response += f"  • Sell price: `{format_price(result['sell_price'])}`\n"
-        response += f"  • **P&L Realized: `{pnl:+,.2f} USD ({result['pnl_percent']:+.2f}%)`**\n"
+        pnl_emoji = _SIGN_EMOJI[(pnl > 0) - (pnl < 0) + 1]
         
         if result["quantity_remaining"] > 0:
-            response += f"\nℹ️ Remaining position: `{result['quantity_remaining']:.8g} {symbol}`"
+            closing_line = f"\nℹ️ Remaining position: `{result['quantity_remaining']:.8g} {symbol}`"
         else:
-            response += f"\n✅ Position fully closed"
-        
-        await update.message.reply_text(response, parse_mode='Markdown')
-        logger.info(f"✅ /sell {symbol} for user {user_id}: P&L {pnl:+.2f}")
+            closing_line = "\n✅ Position fully closed"
+        
+        await _reply(
+            msg,
+            f"{pnl_emoji} **SALE EXECUTED**\n\n"
+            f"**{symbol}**\n"
+            f"  • Quantity sold: `{result['quantity_sold']:.8g}`\n"
+            f"  • Buy price: `{format_price(result['buy_price'])}`\n"
+            f"  • Sell price: `{format_price(result['sell_price'])}`\n"
+            f"  • **P&L Realized: `{pnl:+,.2f} USD ({result['pnl_percent']:+.2f}%)`**\n"
+            f"{closing_line}"
+        )
+        logger.info("✅ /sell %s for user %s: P&L %+.2f", symbol, user_id, pnl)
         
         # Track successful sell
         if ANALYTICS_AVAILABLE:
             track_command('sell', user_id, success=True)
         
     except Exception as e:
-        logger.error(f"❌ /sell error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text("❌ Error executing sale.", parse_mode='Markdown')
+        logger.exception("❌ /sell error: %s", e)
+        await _reply(msg, "❌ Error executing sale.")
         
         # Track failed sell
         if ANALYTICS_AVAILABLE:
@@ -691,22 +906,25 @@ async def sell_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def summary_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show enriched portfolio summary with realized/unrealized P&L."""
-    user_id = update.effective_user.id
-    username = update.effective_user.username or update.effective_user.first_name or "User"
-    
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
+    eu = update.effective_user
+    user_id = eu.id
+    username = eu.username or eu.first_name or "User"
+    msg = update.message
+    
+    cached = _reply_cache.get((user_id, 'summary'))
+    if cached is not None:
+        await _reply(msg, cached)
         if ANALYTICS_AVAILABLE:
-            track_command('summary', user_id, success=False, error='db_offline')
+            track_command('summary', user_id, success=True)
         return
     
     try:
-        summary = portfolio_manager.get_enriched_summary(user_id, username)
+        summary = await portfolio_manager.get_enriched_summary_async(user_id, username)
         
         if summary["num_positions"] == 0:
-            await update.message.reply_text(
-                "📊 **Portfolio Empty**\n\nUse `/add BTC 0.5 45000` to start tracking!",
-                parse_mode='Markdown'
+            await _reply(
+                msg,
+                "📊 **Portfolio Empty**\n\nUse `/add BTC 0.5 45000` to start tracking!"
             )
             if ANALYTICS_AVAILABLE:
                 track_command('summary', user_id, success=True)
@@ -715,42 +933,44 @@ async def summary_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         total_pnl = summary["total_pnl"]
         overall_emoji = "🚀" if total_pnl > 0 else "📉"
         
-        response = f"{overall_emoji} **PORTFOLIO ANALYTICS**\n"
-        response += f"\n──────────────────\n"
-        response += f"📊 **GLOBAL PERFORMANCE**\n"
-        response += f"──────────────────\n\n"
-        response += f"💰 **Total P&L: `{total_pnl:+,.2f} USD`**\n"
-        response += f"  • Unrealized: `{summary['unrealized_pnl']:+,.2f} USD ({summary['unrealized_pnl_percent']:+.2f}%)`\n"
-        response += f"  • Realized: `{summary['realized_pnl']:+,.2f} USD`\n\n"
-        response += f"💵 **Capital:**\n"
-        response += f"  • Invested: `{format_price(summary['total_invested'])}`\n"
-        response += f"  • Current value: `{format_price(summary['total_current_value'])}`\n"
-        response += f"  • Active positions: `{summary['num_positions']}`\n"
+        parts = [
+            f"{overall_emoji} **PORTFOLIO ANALYTICS**\n",
+            "\n──────────────────\n",
+            "📊 **GLOBAL PERFORMANCE**\n",
+            "──────────────────\n\n",
+            f"💰 **Total P&L: `{total_pnl:+,.2f} USD`**\n",
+            f"  • Unrealized: `{summary['unrealized_pnl']:+,.2f} USD ({summary['unrealized_pnl_percent']:+.2f}%)`\n",
+            f"  • Realized: `{summary['realized_pnl']:+,.2f} USD`\n\n",
+            "💵 **Capital:**\n",
+            f"  • Invested: `{format_price(summary['total_invested'])}`\n",
+            f"  • Current value: `{format_price(summary['total_current_value'])}`\n",
+            f"  • Active positions: `{summary['num_positions']}`\n",
+        ]
         
         if summary["best_performer"]:
             best = summary["best_performer"]
             worst = summary["worst_performer"]
-            response += f"\n🏆 **Best performer:** `{best['symbol']}` ({best['pnl_percent']:+.2f}%)\n"
-            response += f"📉 **Worst performer:** `{worst['symbol']}` ({worst['pnl_percent']:+.2f}%)\n"
+            parts.append(f"\n🏆 **Best performer:** `{best['symbol']}` ({best['pnl_percent']:+.2f}%)\n")
+            parts.append(f"📉 **Worst performer:** `{worst['symbol']}` ({worst['pnl_percent']:+.2f}%)\n")
         
         div_score = summary["diversification_score"]
         div_emoji = "🟢" if div_score >= 80 else ("🟡" if div_score >= 50 else "🔴")
-        response += f"\n{div_emoji} **Diversification:** {div_score}% ({summary['num_positions']} positions)\n"
+        parts.append(f"\n{div_emoji} **Diversification:** {div_score}% ({summary['num_positions']} positions)\n")
         
-        response += f"\n_Use `/portfolio` for detailed breakdown_"
+        parts.append("\n_Use `/portfolio` for detailed breakdown_")
+        response = "".join(parts)
         
-        await update.message.reply_text(response, parse_mode='Markdown', disable_web_page_preview=True)
-        logger.info(f"✅ /summary sent to {user_id}")
+        _reply_cache[(user_id, 'summary')] = response
+        await _reply(msg, response)
+        logger.info("✅ /summary sent to %s", user_id)
         
         # Track successful summary
         if ANALYTICS_AVAILABLE:
             track_command('summary', user_id, success=True)
         
     except Exception as e:
-        logger.error(f"❌ /summary error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text("❌ Error generating summary.", parse_mode='Markdown')
+        logger.exception("❌ /summary error: %s", e)
+        await _reply(msg, "❌ Error generating summary.")
         
         # Track failed summary
         if ANALYTICS_AVAILABLE:
@@ -759,51 +979,42 @@ async def summary_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show last 5 transactions with enhanced formatting."""
     user_id = update.effective_user.id
+    msg = update.message
     
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('history', user_id, success=False, error='db_offline')
-        return
-        
     try:
-        transactions = portfolio_manager.get_transactions(user_id, limit=5)
+        transactions = await asyncio.to_thread(portfolio_manager.get_transactions, user_id, limit=5)
         if not transactions:
-            await update.message.reply_text("📃 No transactions yet.\n\nUse `/add BTC 0.5 45000` to get started!", parse_mode='Markdown')
+            await _reply(msg, "📃 No transactions yet.\n\nUse `/add BTC 0.5 45000` to get started!")
             if ANALYTICS_AVAILABLE:
                 track_command('history', user_id, success=True)
             return
         
-        response = "📃 **Transaction History**\n"
-        response += "_Last 5 operations_\n"
+        parts = [
+            "📃 **Transaction History**\n",
+            "_Last 5 operations_\n",
+        ]
         
         for i, tx in enumerate(transactions, 1):
-            action_emoji = {
-                "BUY": "🟢",
-                "SELL": "🔵",
-                "REMOVE": "❌",
-                "PARTIAL_REMOVE": "⚠️"
-            }.get(tx['action'], "🔹")
+            action_emoji = _ACTION_EMOJI.get(tx['action'], "🔹")
             
-            response += f"\n**{i}.** {action_emoji} {tx['action']} `{tx['symbol']}`\n"
-            response += f"   Qty: `{tx['quantity']:.8g}` @ `{format_price(tx['price'])}`"
+            parts.append(f"\n**{i}.** {action_emoji} {tx['action']} `{tx['symbol']}`\n")
+            parts.append(f"   Qty: `{tx['quantity']:.8g}` @ `{format_price(tx['price'])}`")
             
             if 'pnl' in tx and tx['pnl'] is not None:
                 pnl_emoji = "🟢" if tx['pnl'] > 0 else "🔴"
-                response += f"\n   {pnl_emoji} P&L: `{tx['pnl']:+,.2f} USD`"
+                parts.append(f"\n   {pnl_emoji} P&L: `{tx['pnl']:+,.2f} USD`")
         
-        await update.message.reply_text(response, parse_mode='Markdown')
-        logger.info(f"✅ /history sent to {user_id}")
+        response = "".join(parts)
+        await _reply(msg, response)
+        logger.info("✅ /history sent to %s", user_id)
         
         # Track successful history
         if ANALYTICS_AVAILABLE:
             track_command('history', user_id, success=True)
         
     except Exception as e:
-        logger.error(f"❌ /history error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text("❌ Error loading history.", parse_mode='Markdown')
+        logger.exception("❌ /history error: %s", e)
+        await _reply(msg, "❌ Error loading history.")
         
         # Track failed history
         if ANALYTICS_AVAILABLE:
@@ -815,119 +1026,104 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def setalert_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Set TP/SL price alerts for a crypto."""
     user_id = update.effective_user.id
-    
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline. Cannot set alert.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('setalert', user_id, success=False, error='db_offline')
-        return
+    msg = update.message
     
     if len(context.args) != 3:
-        await update.message.reply_text(
-            "⚠️ **Usage:** `/setalert <symbol> <tp|sl> <price>`\n\n"
-            "**Examples:**\n"
-            "`/setalert BTC tp 100000` - Take Profit at $100k\n"
-            "`/setalert BTC sl 40000` - Stop Loss at $40k\n"
-            "`/setalert ETH tp 5000` - Take Profit ETH at $5k\n\n"
-            "💡 **You can set BOTH TP and SL independently**",
-            parse_mode='Markdown'
-        )
+        await _reply(msg, _SETALERT_USAGE)
         return
     
     symbol = context.args[0].upper()
     alert_type = context.args[1].lower()
     
     if alert_type not in ['tp', 'sl']:
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "❌ **Invalid alert type**\n\n"
             "Use `tp` for Take Profit or `sl` for Stop Loss\n\n"
-            "**Example:** `/setalert BTC tp 80000`",
-            parse_mode='Markdown'
+            "**Example:** `/setalert BTC tp 80000`"
         )
         return
     
     try:
         price = float(context.args[2])
     except ValueError:
-        await update.message.reply_text("❌ Price must be a number.", parse_mode='Markdown')
+        await _reply(msg, "❌ Price must be a number.")
         return
     
     if price <= 0:
-        await update.message.reply_text("❌ Price must be positive.", parse_mode='Markdown')
+        await _reply(msg, "❌ Price must be positive.")
         return
     
-    if not is_symbol_supported(symbol):
-        await update.message.reply_text(
-            f"❌ **{symbol} not supported**\n\n"
-            "Supported cryptos: BTC, ETH, SOL, BNB, XRP, ADA, AVAX, DOT, MATIC, LINK, UNI, ATOM, LTC, BCH, XLM",
-            parse_mode='Markdown'
-        )
+    if symbol not in SUPPORTED_SYMBOLS:
+        await _reply(msg, f"❌ **{escape_markdown(symbol)} not supported**\n\n" + _SUPPORTED_CRYPTOS_HINT)
         return
     
-    current_price = get_crypto_price(symbol)
+    # Price, position and existing alert are independent: fetch them concurrently
+    current_price, (position, existing_alert) = await asyncio.gather(
+        get_crypto_price_async(symbol),
+        redis_storage.get_position_and_alert_async(user_id, symbol),
+    )
     
     if current_price is None:
-        await update.message.reply_text(
+        await _reply(
+            msg,
             f"⚠️ **Price API Temporarily Unavailable**\n\n"
             f"Cannot fetch current price for **{symbol}** right now.\n"
             f"This is likely a temporary CoinGecko API issue.\n\n"
-            f"💡 **Please try again in a few minutes.**",
-            parse_mode='Markdown'
+            f"💡 **Please try again in a few minutes.**"
         )
         if ANALYTICS_AVAILABLE:
             track_command('setalert', user_id, success=False, error='price_unavailable')
         return
     
     if alert_type == 'tp' and price <= current_price:
-        await update.message.reply_text(
+        await _reply(
+            msg,
             f"⚠️ **Invalid TP**\n\n"
             f"Take Profit must be **above** current price.\n\n"
             f"Current price: `{format_price(current_price)}`\n"
             f"Your TP: `{format_price(price)}`\n\n"
-            f"💡 Set a higher price for TP (e.g., `{format_price(current_price * 1.1)}`)",
-            parse_mode='Markdown'
+            f"💡 Set a higher price for TP (e.g., `{format_price(current_price * 1.1)}`)"
         )
         if ANALYTICS_AVAILABLE:
             track_command('setalert', user_id, success=False, error='invalid_tp_price')
         return
     
     if alert_type == 'sl' and price >= current_price:
-        await update.message.reply_text(
+        await _reply(
+            msg,
             f"⚠️ **Invalid SL**\n\n"
             f"Stop Loss must be **below** current price.\n\n"
             f"Current price: `{format_price(current_price)}`\n"
             f"Your SL: `{format_price(price)}`\n\n"
-            f"💡 Set a lower price for SL (e.g., `{format_price(current_price * 0.9)}`)",
-            parse_mode='Markdown'
+            f"💡 Set a lower price for SL (e.g., `{format_price(current_price * 0.9)}`)"
         )
         if ANALYTICS_AVAILABLE:
             track_command('setalert', user_id, success=False, error='invalid_sl_price')
         return
     
-    position = redis_storage.get_position(user_id, symbol)
     warning_msg = ""
     if not position and alert_type == 'sl':
         warning_msg = "\n⚠️ _You don't hold this asset in your portfolio_\n"
     
-    existing_alert = redis_storage.get_alert(user_id, symbol)
     if existing_alert:
         if alert_type == 'tp' and existing_alert.get('tp'):
-            await update.message.reply_text(
+            await _reply(
+                msg,
                 f"⚠️ **TP Already Exists**\n\n"
                 f"**{symbol}** already has a Take Profit at `{format_price(existing_alert['tp'])}`\n\n"
-                f"To modify, use: `/removealert {symbol}` first, then set new alert.",
-                parse_mode='Markdown'
+                f"To modify, use: `/removealert {symbol}` first, then set new alert."
             )
             if ANALYTICS_AVAILABLE:
                 track_command('setalert', user_id, success=False, error='tp_exists')
             return
         
         if alert_type == 'sl' and existing_alert.get('sl'):
-            await update.message.reply_text(
+            await _reply(
+                msg,
                 f"⚠️ **SL Already Exists**\n\n"
                 f"**{symbol}** already has a Stop Loss at `{format_price(existing_alert['sl'])}`\n\n"
-                f"To modify, use: `/removealert {symbol}` first, then set new alert.",
-                parse_mode='Markdown'
+                f"To modify, use: `/removealert {symbol}` first, then set new alert."
             )
             if ANALYTICS_AVAILABLE:
                 track_command('setalert', user_id, success=False, error='sl_exists')
@@ -937,43 +1133,42 @@ async def setalert_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         tp_value = price if alert_type == 'tp' else None
         sl_value = price if alert_type == 'sl' else None
         
-        result = redis_storage.set_alert(user_id, symbol, tp=tp_value, sl=sl_value, update_only=True)
+        result = await redis_storage.set_alert_async(user_id, symbol, tp=tp_value, sl=sl_value, update_only=True)
         
         if result["success"]:
             alert = result["alert"]
             
-            response = f"✅ **Alert Set!**\n\n"
-            response += f"**{symbol}**\n"
+            parts = [f"✅ **Alert Set!**\n\n**{symbol}**\n"]
             
             if alert.get('tp'):
                 diff_tp = ((alert['tp'] - current_price) / current_price) * 100
-                response += f"🎯 TP: `{format_price(alert['tp'])}` (+{diff_tp:.1f}%)\n"
+                parts.append(f"🎯 TP: `{format_price(alert['tp'])}` (+{diff_tp:.1f}%)\n")
             
             if alert.get('sl'):
                 diff_sl = ((current_price - alert['sl']) / current_price) * 100
-                response += f"🛡️ SL: `{format_price(alert['sl'])}` (-{diff_sl:.1f}%)\n"
+                parts.append(f"🛡️ SL: `{format_price(alert['sl'])}` (-{diff_sl:.1f}%)\n")
             
-            response += f"\n📊 Current: `{format_price(current_price)}`"
-            response += warning_msg
-            response += f"\n\n_Alerts checked every 15 minutes_\n"
-            response += f"_Use `/listalerts` to see all your alerts_"
+            parts.extend((
+                f"\n📊 Current: `{format_price(current_price)}`",
+                warning_msg,
+                "\n\n_Alerts checked every 15 minutes_\n"
+                "_Use `/listalerts` to see all your alerts_",
+            ))
             
-            await update.message.reply_text(response, parse_mode='Markdown')
-            logger.info(f"✅ Alert set: User {user_id} - {symbol} {alert_type.upper()} @ {price}")
+            await _reply(msg, "".join(parts))
+            logger.info("✅ Alert set: User %s - %s %s @ %s", user_id, symbol, alert_type.upper(), price)
             
             # Track successful setalert
             if ANALYTICS_AVAILABLE:
                 track_command('setalert', user_id, success=True)
         else:
-            await update.message.reply_text(f"❌ {result['message']}", parse_mode='Markdown')
+            await _reply(msg, f"❌ {escape_markdown(result['message'])}")
             if ANALYTICS_AVAILABLE:
                 track_command('setalert', user_id, success=False, error=result['message'])
     
     except Exception as e:
-        logger.error(f"❌ /setalert error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text("❌ Error setting alert.", parse_mode='Markdown')
+        logger.exception("❌ /setalert error: %s", e)
+        await _reply(msg, "❌ Error setting alert.")
         
         # Track failed setalert
         if ANALYTICS_AVAILABLE:
@@ -982,73 +1177,66 @@ async def setalert_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def listalerts_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List all active TP/SL price alerts."""
     user_id = update.effective_user.id
-    
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('listalerts', user_id, success=False, error='db_offline')
-        return
+    msg = update.message
     
     try:
-        alerts = redis_storage.get_alerts(user_id)
+        alerts = await redis_storage.get_alerts_async(user_id)
         
         if not alerts:
-            response = "🔔 **Your Price Alerts**\n\n"
-            response += "_You have no active alerts._\n\n"
-            response += "**Set alerts with:**\n"
-            response += "`/setalert BTC tp 100000`\n"
-            response += "`/setalert BTC sl 40000`"
+            response = _EMPTY_ALERTS_MSG
         else:
-            response = "🔔 **Your Price Alerts**\n"
-            response += f"_Active alerts: {len(alerts)}_\n"
+            parts = ["🔔 **Your Price Alerts**\n", f"_Active alerts: {len(alerts)}_\n"]
+            
+            # One batched price lookup for every alerted symbol
+            prices = await get_multiple_prices_async(list(alerts))
             
             for symbol, alert_data in alerts.items():
-                current_price = get_crypto_price(symbol)
+                current_price = prices.get(symbol.upper())
                 
                 if current_price:
-                    response += f"\n{'✅' if current_price else '⚠️'} **{symbol}**\n"
-                    response += f"📊 Current: `{format_price(current_price)}`\n"
+                    parts.append(f"\n✅ **{symbol}**\n")
+                    parts.append(f"📊 Current: `{format_price(current_price)}`\n")
+                    
+                    # Percent per USD at this price, shared by the TP and SL diffs
+                    pct = 100.0 / current_price
                     
                     if alert_data.get('tp'):
                         tp = alert_data['tp']
-                        diff_tp = ((tp - current_price) / current_price) * 100
+                        diff_tp = (tp - current_price) * pct
                         
                         if current_price >= tp:
                             status_tp = f"✅ **TARGET REACHED!** (+{diff_tp:.1f}%)"
                         else:
                             status_tp = f"⏳ Waiting (+{diff_tp:.1f}% to go)"
                         
-                        response += f"🎯 TP: `{format_price(tp)}` - {status_tp}\n"
+                        parts.append(f"🎯 TP: `{format_price(tp)}` - {status_tp}\n")
                     
                     if alert_data.get('sl'):
                         sl = alert_data['sl']
-                        diff_sl = ((current_price - sl) / current_price) * 100
+                        diff_sl = (current_price - sl) * pct
                         
                         if current_price <= sl:
                             status_sl = f"🚨 **STOP TRIGGERED!** (-{diff_sl:.1f}%)"
                         else:
                             status_sl = f"⏳ Safe (+{diff_sl:.1f}% margin)"
                         
-                        response += f"🛡️ SL: `{format_price(sl)}` - {status_sl}"
+                        parts.append(f"🛡️ SL: `{format_price(sl)}` - {status_sl}")
                 else:
-                    response += f"\n⚠️ **{symbol}**\n"
-                    response += f"  • Current: _price unavailable_"
+                    parts.append(f"\n⚠️ **{symbol}**\n  • Current: _price unavailable_")
             
-            response += f"\n\n_Alerts checked every 15 minutes_\n"
-            response += f"_Remove with `/removealert <SYMBOL>`_"
+            parts.append(_ALERTS_FOOTER)
+            response = "".join(parts)
         
-        await update.message.reply_text(response, parse_mode='Markdown', disable_web_page_preview=True)
-        logger.info(f"✅ /listalerts sent to {user_id}")
+        await _reply(msg, response)
+        logger.info("✅ /listalerts sent to %s", user_id)
         
         # Track successful listalerts
         if ANALYTICS_AVAILABLE:
             track_command('listalerts', user_id, success=True)
     
     except Exception as e:
-        logger.error(f"❌ /listalerts error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text("❌ Error loading alerts.", parse_mode='Markdown')
+        logger.exception("❌ /listalerts error: %s", e)
+        await _reply(msg, "❌ Error loading alerts.")
         
         # Track failed listalerts
         if ANALYTICS_AVAILABLE:
@@ -1057,66 +1245,58 @@ async def listalerts_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def removealert_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Remove all price alerts (TP and SL) for a crypto."""
     user_id = update.effective_user.id
-    
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('removealert', user_id, success=False, error='db_offline')
-        return
+    msg = update.message
     
     if len(context.args) != 1:
-        await update.message.reply_text(
-            "⚠️ **Usage:** `/removealert <symbol>`\n\n"
-            "**Example:** `/removealert BTC`\n\n"
-            "This will remove BOTH TP and SL alerts for the crypto.",
-            parse_mode='Markdown'
-        )
+        await _reply(msg, _REMOVEALERT_USAGE)
         return
     
     symbol = context.args[0].upper()
     
+    # Alerts only exist for supported symbols; also keeps raw input out of the Markdown reply
+    if symbol not in SUPPORTED_SYMBOLS:
+        await _reply(msg, f"❌ **{escape_markdown(symbol)} not supported**\n\n" + _SUPPORTED_CRYPTOS_HINT)
+        return
+    
     try:
-        alert = redis_storage.get_alert(user_id, symbol)
+        alert = await redis_storage.get_alert_async(user_id, symbol)
         
         if not alert:
-            await update.message.reply_text(
+            await _reply(
+                msg,
                 f"⚠️ No alert found for **{symbol}**.\n\n"
-                f"Use `/listalerts` to see your active alerts.",
-                parse_mode='Markdown'
+                f"Use `/listalerts` to see your active alerts."
             )
             if ANALYTICS_AVAILABLE:
                 track_command('removealert', user_id, success=False, error='alert_not_found')
             return
         
-        success = redis_storage.remove_alert(user_id, symbol)
+        success = await redis_storage.remove_alert_async(user_id, symbol)
         
         if success:
-            response = f"✅ **Alerts Removed**\n\n"
-            response += f"All alerts for `{symbol}` deleted:\n"
+            parts = [f"✅ **Alerts Removed**\n\nAll alerts for `{symbol}` deleted:\n"]
             
             if alert.get('tp'):
-                response += f"  • TP: `{format_price(alert['tp'])}`\n"
+                parts.append(f"  • TP: `{format_price(alert['tp'])}`\n")
             if alert.get('sl'):
-                response += f"  • SL: `{format_price(alert['sl'])}`\n"
+                parts.append(f"  • SL: `{format_price(alert['sl'])}`\n")
             
-            response += f"\n_Use `/setalert` to create new alerts_"
+            parts.append("\n_Use `/setalert` to create new alerts_")
             
-            await update.message.reply_text(response, parse_mode='Markdown')
-            logger.info(f"✅ Alert removed: User {user_id} - {symbol}")
+            await _reply(msg, "".join(parts))
+            logger.info("✅ Alert removed: User %s - %s", user_id, symbol)
             
             # Track successful removealert
             if ANALYTICS_AVAILABLE:
                 track_command('removealert', user_id, success=True)
         else:
-            await update.message.reply_text("❌ Error removing alert. Please try again.", parse_mode='Markdown')
+            await _reply(msg, "❌ Error removing alert. Please try again.")
             if ANALYTICS_AVAILABLE:
                 track_command('removealert', user_id, success=False, error='removal_failed')
     
     except Exception as e:
-        logger.error(f"❌ /removealert error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text("❌ Error removing alert.", parse_mode='Markdown')
+        logger.exception("❌ /removealert error: %s", e)
+        await _reply(msg, "❌ Error removing alert.")
         
         # Track failed removealert
         if ANALYTICS_AVAILABLE:
@@ -1144,7 +1324,7 @@ async def recommend_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             track_command('recommend', user_id, success=True)
     
     except Exception as e:
-        logger.error(f"❌ /recommend error: {e}")
+        logger.error("❌ /recommend error: %s", e)
         
         # Track failed recommend
         if ANALYTICS_AVAILABLE:
@@ -1157,46 +1337,45 @@ async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler for /subscribe - Create Stripe checkout session."""
     user_id = update.effective_chat.id
     username = update.effective_user.username
+    msg = update.message
     
     if not STRIPE_AVAILABLE:
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "⚠️ **Premium subscriptions temporarily unavailable**\n\n"
-            "Please try again later or contact support.",
-            parse_mode='Markdown'
+            "Please try again later or contact support."
         )
         if ANALYTICS_AVAILABLE:
             track_command('subscribe', user_id, success=False, error='stripe_unavailable')
         return
     
-    logger.info(f"💳 /subscribe called by user {user_id} (@{username})")
+    logger.info("💳 /subscribe called by user %s (@%s)", user_id, username)
     
-    status = get_subscription_status(user_id)
+    status = await asyncio.to_thread(get_subscription_status, user_id)
     
     if status == 'premium':
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "✅ **You're already Premium!**\n\n"
-            "Use `/manage` to manage your subscription.",
-            parse_mode='Markdown'
+            "Use `/manage` to manage your subscription."
         )
         if ANALYTICS_AVAILABLE:
             track_command('subscribe', user_id, success=False, error='already_premium')
         return
     
-    result = create_checkout_session(
+    result = await asyncio.to_thread(
+        create_checkout_session,
         user_id=user_id,
         username=username
     )
     
     if result['success']:
-        keyboard = [[
-            InlineKeyboardButton(
-                "🔥 Subscribe Now - €9/month",
-                url=result['url']
-            )
-        ]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = InlineKeyboardMarkup.from_button(
+            InlineKeyboardButton(_SUBSCRIBE_BUTTON_TEXT, url=result['url'])
+        )
         
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "🔒 **Upgrade to Premium**\n\n"
             "**€9/month** - Cancel anytime\n\n"
             "**Premium Features:**\n"
@@ -1206,24 +1385,23 @@ async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "✅ Advanced analytics\n"
             "✅ Priority support\n\n"
             "*Click below to subscribe securely via Stripe*",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            reply_markup=reply_markup
         )
         
-        logger.info(f"✅ Checkout session created for user {user_id}: {result['session_id']}")
+        logger.info("✅ Checkout session created for user %s: %s", user_id, result['session_id'])
         
         # Track successful subscribe click
         if ANALYTICS_AVAILABLE:
             track_command('subscribe', user_id, success=True)
     
     else:
-        logger.error(f"❌ Failed to create checkout session: {result['error']}")
-        await update.message.reply_text(
+        logger.error("❌ Failed to create checkout session: %s", result['error'])
+        await _reply(
+            msg,
             "❌ **Payment setup error**\n\n"
             "Sorry, we couldn't create your payment session. "
             "Please try again later or contact support.\n\n"
-            f"Error: {result['error']}",
-            parse_mode='Markdown'
+            f"Error: {result['error']}"
         )
         
         # Track failed subscribe
@@ -1239,35 +1417,37 @@ async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     3. Premium with invalid/expired subscription_id (auto-cleaned, treated as manual)
     """
     user_id = update.effective_chat.id
+    msg = update.message
     
     if not STRIPE_AVAILABLE:
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "⚠️ **Subscription management temporarily unavailable**\n\n"
-            "Please try again later or contact support.",
-            parse_mode='Markdown'
+            "Please try again later or contact support."
         )
         if ANALYTICS_AVAILABLE:
             track_command('manage', user_id, success=False, error='stripe_unavailable')
         return
     
-    status = get_subscription_status(user_id)
+    status = await asyncio.to_thread(get_subscription_status, user_id)
     
     if status != 'premium':
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "⚠️ **You don't have an active subscription**\n\n"
-            "Use `/subscribe` to upgrade to Premium!",
-            parse_mode='Markdown'
+            "Use `/subscribe` to upgrade to Premium!"
         )
         if ANALYTICS_AVAILABLE:
             track_command('manage', user_id, success=False, error='not_premium')
         return
     
     # Check if user has Stripe subscription ID
-    subscription_id = get_subscription_id(user_id)
+    subscription_id = await asyncio.to_thread(get_subscription_id, user_id)
     
     if not subscription_id:
         # User is Premium but NO Stripe subscription (manual Premium)
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "✅ **Premium Access Active**\n\n"
             "**Status:** Premium (Manually Granted)\n"
             "**Type:** Administrative Access\n\n"
@@ -1277,8 +1457,7 @@ async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "• You received promotional access\n"
             "• Your subscription was manually activated\n\n"
             "📧 For questions, contact support at:\n"
-            "contact.sentinellabs@gmail.com",
-            parse_mode='Markdown'
+            "contact.sentinellabs@gmail.com"
         )
         
         # Track successful manage (manual Premium)
@@ -1287,7 +1466,7 @@ async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # User has Stripe subscription - retrieve details
-    sub_result = retrieve_subscription(user_id)
+    sub_result = await asyncio.to_thread(retrieve_subscription, user_id)
     
     if sub_result['success']:
         sub = sub_result['subscription']
@@ -1311,7 +1490,7 @@ async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "_We'll add a self-service portal soon!_"
         )
         
-        await update.message.reply_text(message_text, parse_mode='Markdown')
+        await _reply(msg, message_text)
         
         # Track successful manage
         if ANALYTICS_AVAILABLE:
@@ -1320,19 +1499,22 @@ async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Stripe subscription not found or invalid/expired
         # Clean up invalid subscription_id and treat as manual Premium
         error_msg = sub_result.get('error', 'unknown')
-        logger.warning(f"⚠️ Invalid subscription_id for user {user_id}: {error_msg}")
-        logger.info(f"🧹 Auto-cleaning invalid Stripe data for user {user_id}")
+        logger.warning("⚠️ Invalid subscription_id for user %s: %s", user_id, error_msg)
+        logger.info("🧹 Auto-cleaning invalid Stripe data for user %s", user_id)
         
         # Clean up invalid subscription_id from Redis
         try:
-            redis_storage.redis_client.delete(f"user:{user_id}:subscription_id")
-            redis_storage.redis_client.delete(f"user:{user_id}:stripe_customer_id")
-            logger.info(f"✅ Cleaned up invalid Stripe data for user {user_id}")
+            await redis_storage.async_redis_client.delete(
+                f"user:{user_id}:subscription_id",
+                f"user:{user_id}:stripe_customer_id",
+            )
+            logger.info("✅ Cleaned up invalid Stripe data for user %s", user_id)
         except Exception as e:
-            logger.error(f"Error cleaning up Stripe data: {e}")
+            logger.error("Error cleaning up Stripe data: %s", e)
         
         # Show manual Premium message (user keeps Premium access)
-        await update.message.reply_text(
+        await _reply(
+            msg,
             "✅ **Premium Access Active**\n\n"
             "**Status:** Premium (Manually Granted)\n"
             "**Type:** Administrative Access\n\n"
@@ -1342,8 +1524,7 @@ async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "• You received promotional access\n"
             "• Your subscription was manually activated\n\n"
             "📧 For questions, contact support at:\n"
-            "contact.sentinellabs@gmail.com",
-            parse_mode='Markdown'
+            "contact.sentinellabs@gmail.com"
         )
         
         # Track successful manage (treated as manual Premium after cleanup)
@@ -1354,28 +1535,20 @@ async def manage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def mydata_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Export user data (GDPR Right to Access - Art. 15)."""
-    user_id = update.effective_user.id
-    username = update.effective_user.username or update.effective_user.first_name or "User"
-    
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('mydata', user_id, success=False, error='db_offline')
-        return
+    eu = update.effective_user
+    user_id = eu.id
+    username = eu.username or eu.first_name or "User"
+    msg = update.message
     
     try:
-        profile = redis_storage.get_user_profile(user_id) or {"user_id": user_id, "username": username}
-        positions = redis_storage.get_all_positions(user_id)
-        alerts = redis_storage.get_alerts(user_id)
-        transactions = redis_storage.get_transactions(user_id, limit=100)
-        realized_pnl = redis_storage.get_realized_pnl(user_id)
+        snapshot = await redis_storage.get_user_snapshot_async(user_id)
         
         data_export = {
-            "profile": profile,
-            "positions": positions,
-            "alerts": alerts,
-            "transactions": transactions,
-            "realized_pnl": realized_pnl,
+            "profile": snapshot["profile"] or {"user_id": user_id, "username": username},
+            "positions": snapshot["positions"],
+            "alerts": snapshot["alerts"],
+            "transactions": snapshot["transactions"],
+            "realized_pnl": snapshot["realized_pnl"],
             "export_date": datetime.utcnow().isoformat(),
             "gdpr_info": {
                 "right": "GDPR Article 15 - Right to Access",
@@ -1384,37 +1557,25 @@ async def mydata_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             }
         }
         
-        json_output = json.dumps(data_export, indent=2, ensure_ascii=False)
-        json_file = BytesIO(json_output.encode('utf-8'))
+        # orjson writes UTF-8 bytes directly, no intermediate str copy
+        json_file = BytesIO(orjson.dumps(data_export, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         json_file.name = f"cryptosentinel_data_{user_id}.json"
         
-        await update.message.reply_document(
+        await msg.reply_document(
             document=json_file,
             filename=f"cryptosentinel_data_{user_id}.json",
-            caption=(
-                "📦 **Your Data Export (GDPR)**\n\n"
-                "This file contains ALL your data stored in CryptoSentinel AI:\n"
-                "• Profile\n"
-                "• Portfolio positions\n"
-                "• Price alerts\n"
-                "• Transaction history\n"
-                "• Realized P&L records\n\n"
-                "_This is your RIGHT TO ACCESS under GDPR Article 15._\n\n"
-                "📄 [Privacy Policy](https://sentiment-trading-bot-production.up.railway.app/privacy)"
-            ),
+            caption=_MYDATA_CAPTION,
             parse_mode='Markdown'
         )
-        logger.info(f"✅ /mydata export sent to user {user_id}")
+        logger.info("✅ /mydata export sent to user %s", user_id)
         
         # Track successful mydata
         if ANALYTICS_AVAILABLE:
             track_command('mydata', user_id, success=True)
         
     except Exception as e:
-        logger.error(f"❌ /mydata error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text("❌ Error exporting data.", parse_mode='Markdown')
+        logger.exception("❌ /mydata error: %s", e)
+        await _reply(msg, "❌ Error exporting data.")
         
         # Track failed mydata
         if ANALYTICS_AVAILABLE:
@@ -1423,99 +1584,67 @@ async def mydata_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def deletedata_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Delete all user data (GDPR Right to Erasure - Art. 17)."""
     user_id = update.effective_user.id
-    
-    if not DB_AVAILABLE:
-        await update.message.reply_text("⚠️ Database offline.", parse_mode='Markdown')
-        if ANALYTICS_AVAILABLE:
-            track_command('deletedata', user_id, success=False, error='db_offline')
-        return
-    
-    confirmation_text = (
-        "⚠️ **DELETE ALL YOUR DATA?**\n\n"
-        "This will PERMANENTLY delete:\n"
-        "• Your profile\n"
-        "• All portfolio positions\n"
-        "• All price alerts\n"
-        "• Transaction history\n"
-        "• Realized P&L records\n\n"
-        "**⚠️ THIS CANNOT BE UNDONE!**\n\n"
-        "To confirm, send:\n"
-        "`/deletedata CONFIRM`\n\n"
-        "_This is your RIGHT TO ERASURE under GDPR Article 17._"
-    )
+    msg = update.message
     
     if len(context.args) == 0:
-        await update.message.reply_text(confirmation_text, parse_mode='Markdown')
+        await _reply(msg, _DELETEDATA_CONFIRM_PROMPT)
         if ANALYTICS_AVAILABLE:
             track_command('deletedata', user_id, success=False, error='awaiting_confirmation')
         return
     
     if len(context.args) == 1 and context.args[0].upper() == "CONFIRM":
         try:
-            positions = redis_storage.get_all_positions(user_id)
-            for symbol in positions.keys():
-                redis_storage.delete_position(user_id, symbol)
-            
-            alerts = redis_storage.get_alerts(user_id)
-            for symbol in alerts.keys():
-                redis_storage.remove_alert(user_id, symbol)
+            if not await redis_storage.wipe_user_async(user_id):
+                raise RuntimeError("wipe_user_async failed")
+            _invalidate_reply_cache(user_id)
+            portfolio_manager.invalidate_portfolio_cache(user_id)
             
-            redis_storage.redis_client.delete(f"user:{user_id}:profile")
-            redis_storage.redis_client.delete(f"user:{user_id}:transactions")
-            redis_storage.redis_client.delete(f"user:{user_id}:realized_pnl")
-            
-            response = (
-                "✅ **DATA DELETED**\n\n"
-                "All your data has been permanently deleted from CryptoSentinel AI.\n\n"
-                "This includes:\n"
-                "• Profile\n"
-                "• Portfolio positions\n"
-                "• Price alerts\n"
-                "• Transaction history\n"
-                "• Realized P&L\n\n"
-                "You can start fresh anytime with `/start`.\n\n"
-                "Thank you for using CryptoSentinel AI. 👋"
-            )
-            
-            await update.message.reply_text(response, parse_mode='Markdown')
-            logger.info(f"✅ /deletedata executed for user {user_id} - ALL DATA DELETED")
+            await _reply(msg, _DELETEDATA_DONE_MSG)
+            logger.info("✅ /deletedata executed for user %s - ALL DATA DELETED", user_id)
             
             # Track successful deletedata
             if ANALYTICS_AVAILABLE:
                 track_command('deletedata', user_id, success=True)
             
         except Exception as e:
-            logger.error(f"❌ /deletedata error: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            await update.message.reply_text("❌ Error deleting data. Please try again.", parse_mode='Markdown')
+            logger.exception("❌ /deletedata error: %s", e)
+            await _reply(msg, "❌ Error deleting data. Please try again.")
             
             # Track failed deletedata
             if ANALYTICS_AVAILABLE:
                 track_command('deletedata', user_id, success=False, error=str(e))
     else:
-        await update.message.reply_text(
-            "⚠️ Invalid confirmation.\n\nUse: `/deletedata CONFIRM`",
-            parse_mode='Markdown'
+        await _reply(
+            msg,
+            "⚠️ Invalid confirmation.\n\nUse: `/deletedata CONFIRM`"
         )
         if ANALYTICS_AVAILABLE:
             track_command('deletedata', user_id, success=False, error='invalid_confirmation')
 
 # ===== MESSAGE HANDLERS =====
 
+_SENTIMENT_EMOJI = {'BULLISH': '🚀', 'BEARISH': '📉', 'NEUTRAL': '➡️'}
+
+async def _analyze_sentiment(text: str) -> dict:
+    """analyze_sentiment_async, shared through Redis for repeated texts when it is up."""
+    if not DB_AVAILABLE:
+        return await analyze_sentiment_async(text)
+    return await redis_storage.get_or_compute_analysis_async(text, analyze_sentiment_async)
+
 async def analyze_url(update: Update, url: str):
-    scraping_msg = await update.message.reply_text("📰 Scraping article...", parse_mode='Markdown')
+    msg = update.message
+    scraping_msg = await _reply(msg, "📰 Scraping article...")
     try:
-        article_text = extract_article(url)
+        article_text = await asyncio.get_running_loop().run_in_executor(_scraper_executor, extract_article, url)
         if not article_text:
             await scraping_msg.delete()
-            await update.message.reply_text("❌ Failed to extract article.", parse_mode='Markdown')
+            await _reply(msg, "❌ Failed to extract article.")
             return
         
         await scraping_msg.edit_text("🔍 Analyzing with Perplexity AI...")
-        result = analyze_sentiment(article_text)
+        result = await _analyze_sentiment(article_text)
         
-        emoji = {'BULLISH': '🚀', 'BEARISH': '📉', 'NEUTRAL': '➡️'}.get(result['sentiment'], '❓')
+        emoji = _SENTIMENT_EMOJI.get(result['sentiment'], '❓')
         response = f"""
 📰 **Article Analysis**
 
@@ -1526,17 +1655,18 @@ async def analyze_url(update: Update, url: str):
 _Powered by [Perplexity AI](https://www.perplexity.ai)_
 """
         await scraping_msg.delete()
-        await update.message.reply_text(response, parse_mode='Markdown', disable_web_page_preview=True)
+        await _reply(msg, response)
     except Exception as e:
-        logger.error(f"Error in analyze_url: {e}")
+        logger.error("Error in analyze_url: %s", e)
         await scraping_msg.delete()
-        await update.message.reply_text("❌ Analysis failed.", parse_mode='Markdown')
+        await _reply(msg, "❌ Analysis failed.")
 
 async def analyze_text(update: Update, text: str):
-    analyzing_msg = await update.message.reply_text("🔍 Analyzing...")
+    msg = update.message
+    analyzing_msg = await msg.reply_text("🔍 Analyzing...")
     try:
-        result = analyze_sentiment(text)
-        emoji = {'BULLISH': '🚀', 'BEARISH': '📉', 'NEUTRAL': '➡️'}.get(result['sentiment'], '❓')
+        result = await _analyze_sentiment(text)
+        emoji = _SENTIMENT_EMOJI.get(result['sentiment'], '❓')
         response = f"""
 {emoji} **{result['sentiment']}** ({result['confidence']}%)
 
@@ -1545,25 +1675,39 @@ async def analyze_text(update: Update, text: str):
 _Powered by [Perplexity AI](https://www.perplexity.ai)_
 """
         await analyzing_msg.delete()
-        await update.message.reply_text(response, parse_mode='Markdown', disable_web_page_preview=True)
+        await _reply(msg, response)
     except Exception as e:
-        logger.error(f"Error: {e}")
+        logger.error("Error: %s", e)
         await analyzing_msg.delete()
-        await update.message.reply_text("❌ Analysis failed.", parse_mode='Markdown')
+        await _reply(msg, "❌ Analysis failed.")
+
+def _echo_hint(user_message: str) -> str:
+    """Echo a chat message back with the /analyze hint.
+    
+    The text is Markdown-escaped so a stray _ or * from the user can't make
+    Telegram reject the reply with a parse error. It stays outside any
+    entity: legacy Markdown doesn't accept escapes inside _italic_.
+    """
+    return f"💬 _You said:_ {escape_markdown(user_message)}\n\nUse `/analyze` for sentiment analysis!"
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_message = update.message.text
-    urls = extract_urls(user_message)
+    msg = update.message
+    user_message = msg.text
+    # Fast path: short chat without a link is never analysed, reply right away
+    if len(user_message) <= 30 and 'http' not in user_message:
+        await _reply(msg, _echo_hint(user_message))
+        return
+    
+    urls = _find_urls(user_message)
     if urls:
         await analyze_url(update, urls[0])
-        return
-    if len(user_message) > 30:
+    elif len(user_message) > 30:
         await analyze_text(update, user_message)
     else:
-        await update.message.reply_text(f"💬 You said: _{user_message}_\n\nUse `/analyze` for sentiment analysis!", parse_mode='Markdown')
+        await _reply(msg, _echo_hint(user_message))
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
-    logger.error(f"Bot error: {context.error}")
+    logger.error("Bot error: %s", context.error)
 
 # ===== FASTAPI ROUTES =====
 
@@ -1646,27 +1790,144 @@ async def dashboard_script():
     except FileNotFoundError:
         return Response(content="// JS not found", media_type="application/javascript")
 
+def _get_chat_lock(chat_id: int) -> asyncio.Lock:
+    """Get the lock serialising updates of one chat."""
+    lock = _chat_locks.get(chat_id)
+    if lock is None:
+        lock = _chat_locks[chat_id] = asyncio.Lock()
+    return lock
+
+async def process_update_in_background(update: Update):
+    """Run the bot handlers for an update outside the webhook request."""
+    chat = update.effective_chat
+    if chat is None:
+        async with _update_semaphore:
+            await application.process_update(update)
+        return
+    
+    # Wait for the chat's turn before taking a global slot
+    async with _get_chat_lock(chat.id):
+        async with _update_semaphore:
+            await application.process_update(update)
+
+def _on_update_task_done(task: asyncio.Task):
+    """Forget a finished background update and log it if it crashed."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("❌ Background update failed", exc_info=task.exception())
+
 @app.post("/webhook")
 async def webhook(request: Request):
+    # Checked before reading the body: scanner traffic is rejected without a JSON parse
+    # Compared as bytes: compare_digest raises TypeError on non-ASCII str,
+    # and Starlette decodes headers as latin-1
+    if TG_WEBHOOK_SECRET and not secrets.compare_digest(
+        request.headers.get("X-Telegram-Bot-Api-Secret-Token", "").encode('latin-1'),
+        TG_WEBHOOK_SECRET.encode(),
+    ):
+        return Response(status_code=401)
+    
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         update = Update.de_json(data, application.bot)
-        await application.process_update(update)
-        return Response(status_code=200)
     except Exception as e:
-        logger.error(f"Webhook error: {e}")
+        logger.error("Webhook error: %s", e)
         return Response(status_code=500)
+    
+    if len(_background_tasks) >= MAX_PENDING_UPDATES:
+        # Backlog full: refuse instead of dropping; Telegram redelivers later
+        logger.warning("⚠️ Update backlog full (%d pending), asking Telegram to retry", len(_background_tasks))
+        return Response(status_code=503)
+    
+    # Ack Telegram right away so slow handlers never trigger a redelivery
+    task = asyncio.create_task(process_update_in_background(update))
+    _background_tasks.add(task)
+    task.add_done_callback(_on_update_task_done)
+    return Response(status_code=200)
 
 @app.get("/webhook")
 async def webhook_check():
     return {"status": "ok", "method": "GET", "endpoint": "/webhook"}
 
+# (command, callback) pairs routed by dispatch_command
+COMMAND_HANDLERS = (
+    ("start", start),
+    ("help", help_command),
+    ("analyze", analyze_command),
+    ("portfolio", portfolio_command),
+    ("add", add_command),
+    ("remove", remove_command),
+    ("sell", sell_command),
+    ("summary", summary_command),
+    ("history", history_command),
+    
+    ("setalert", setalert_command),
+    ("listalerts", listalerts_command),
+    ("removealert", removealert_command),
+    
+    ("recommend", recommend_command),
+    
+    ("subscribe", subscribe_command),
+    ("manage", manage_command),
+    
+    ("mydata", mydata_command),
+    ("deletedata", deletedata_command),
+)
+_COMMAND_DISPATCH = dict(COMMAND_HANDLERS)
+
+# Commands that need Redis; answered by dispatch_command while it is down
+_DB_COMMANDS = frozenset({
+    "portfolio", "add", "remove", "sell", "summary", "history",
+    "setalert", "listalerts", "removealert", "recommend",
+    "mydata", "deletedata",
+})
+
+async def dispatch_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Route a /command to its handler with one dict lookup.
+    
+    Replaces one CommandHandler per command, each of which re-parsed the
+    message entities for every incoming update. Mirrors CommandHandler's
+    parsing: "/cmd@BotName arg1 arg2" -> context.args == ["arg1", "arg2"].
+    """
+    message = update.effective_message
+    if message is None or not message.text:
+        return
+    
+    words = message.text.split()
+    command, _, target = words[0][1:].partition('@')
+    if target and target.lower() != context.bot.username.lower():
+        return
+    
+    command = command.lower()
+    callback = _COMMAND_DISPATCH.get(command)
+    if callback is None:
+        return
+    
+    if not DB_AVAILABLE and command in _DB_COMMANDS:
+        # Degraded mode: answer before any decorator touches Redis
+        await _reply(message, _DB_OFFLINE_MSG)
+        if ANALYTICS_AVAILABLE:
+            track_command(command, update.effective_user.id, success=False, error='db_offline')
+        return
+    
+    context.args = words[1:]
+    await callback(update, context)
+
 async def setup_application():
     global application
+    if application is not None:
+        # Already built and started by an earlier startup in this process
+        return application
     if not TELEGRAM_TOKEN:
         raise ValueError("TELEGRAM_BOT_TOKEN required")
     
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    rate_limiter = AIORateLimiter(
+        overall_max_rate=TELEGRAM_MAX_SENDS_PER_SECOND,
+        overall_time_period=1,
+        max_retries=TELEGRAM_SEND_MAX_RETRIES,
+    )
+    # Updates arrive through the FastAPI route, so PTB's polling/webhook Updater is never used
+    application = Application.builder().token(TELEGRAM_TOKEN).updater(None).rate_limiter(rate_limiter).build()
     
     if TIER_SYSTEM_AVAILABLE:
         application.bot_data['tier_manager'] = tier_manager
@@ -1675,30 +1936,10 @@ async def setup_application():
     else:
         logger.warning("⚠️ Tier manager not initialized - all features free")
     
-    # Add all command handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("analyze", analyze_command))
-    application.add_handler(CommandHandler("portfolio", portfolio_command))
-    application.add_handler(CommandHandler("add", add_command))
-    application.add_handler(CommandHandler("remove", remove_command))
-    application.add_handler(CommandHandler("sell", sell_command))
-    application.add_handler(CommandHandler("summary", summary_command))
-    application.add_handler(CommandHandler("history", history_command))
-    
-    application.add_handler(CommandHandler("setalert", setalert_command))
-    application.add_handler(CommandHandler("listalerts", listalerts_command))
-    application.add_handler(CommandHandler("removealert", removealert_command))
-    
-    application.add_handler(CommandHandler("recommend", recommend_command))
-    
-    application.add_handler(CommandHandler("subscribe", subscribe_command))
-    application.add_handler(CommandHandler("manage", manage_command))
-    
-    application.add_handler(CommandHandler("mydata", mydata_command))
-    application.add_handler(CommandHandler("deletedata", deletedata_command))
-    
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    # All commands go through one dispatcher; plain text to handle_message
+    add_handler = application.add_handler
+    add_handler(MessageHandler(COMMAND_MESSAGES, dispatch_command))
+    add_handler(MessageHandler(TEXT_NON_COMMAND, handle_message))
     application.add_error_handler(error_handler)
     
     await application.initialize()
@@ -1707,14 +1948,26 @@ async def setup_application():
     if WEBHOOK_URL:
         clean_webhook_url = WEBHOOK_URL.rstrip('/')
         webhook_endpoint = f"{clean_webhook_url}/webhook"
-        await application.bot.set_webhook(url=webhook_endpoint)
-        logger.info(f"✅ Webhook configured: {webhook_endpoint}")
+        await application.bot.set_webhook(
+            url=webhook_endpoint,
+            secret_token=TG_WEBHOOK_SECRET,
+            allowed_updates=WEBHOOK_ALLOWED_UPDATES,
+        )
+        logger.info("✅ Webhook configured: %s", webhook_endpoint)
+    
+    return application
 
 @app.on_event("startup")
 async def startup():
     global DB_AVAILABLE
     logger.info("🚀 FastAPI startup - Redis Mode")
     
+    loop = asyncio.get_running_loop()
+    # uvicorn only picks uvloop when it imports; say so if it silently fell back
+    if not type(loop).__module__.startswith("uvloop"):
+        logger.warning("⚠️ Running on the default asyncio loop - is uvloop installed?")
+    loop.set_default_executor(_blocking_executor)
+    
     try:
         logger.info("🔥 Testing Redis connection...")
         redis_connected = redis_storage.test_connection()
@@ -1726,7 +1979,7 @@ async def startup():
             DB_AVAILABLE = False
             logger.warning("⚠️ Bot starting in LIMITED MODE (Sentiment only, no Portfolio/Alerts)")
     except Exception as e:
-        logger.error(f"⚠️ Redis connection failed: {e}")
+        logger.error("⚠️ Redis connection failed: %s", e)
         logger.warning("⚠️ Bot starting in LIMITED MODE (Sentiment only, no Portfolio/Alerts)")
         DB_AVAILABLE = False
     
@@ -1750,11 +2003,31 @@ async def startup():
     else:
         logger.warning("⚠️ Analytics system not available")
     
+    # Build the shared CoinGecko/Perplexity connection pool up front
+    get_http_client()
+    
     await setup_application()
     logger.info("✅ Server ready")
 
 @app.on_event("shutdown")
 async def shutdown():
+    global application
+    # Let in-flight updates finish before tearing the bot down
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+    
     if application:
         await application.stop()
         await application.shutdown()
+        application = None
+    
+    await close_http_client()
+    await redis_storage.close_async_client()
+    _scraper_executor.shutdown(wait=False, cancel_futures=True)
+    _blocking_executor.shutdown(wait=False, cancel_futures=True)
+
+if __name__ == "__main__":
+    # Local runs: same uvloop/httptools stack as the Dockerfile. Keep a
+    # single worker; the bot Application, caches and chat locks are per-process.
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=PORT, loop="uvloop", http="httptools")
@@ -15,16 +15,22 @@ Last updated: 2026-02-10 09:30 CET (REDIS CACHE)
 """
 import os
 import time
+import asyncio
+import threading
 import urllib.request
 import urllib.error
-import json
+import orjson
 from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Import Redis client from redis_storage
-from backend.redis_storage import redis_client
+from backend.redis_storage import async_redis_client, redis_client
+from backend.http_client import get_http_client
+
+import httpx
+from cachetools import TTLCache
 
 COINGECKO_API_BASE = "https://api.coingecko.com/api/v3"
 
@@ -47,10 +53,39 @@ SYMBOL_TO_ID = {
     "XLM": "stellar",
 }
 
+# Fixed at import: O(1) membership checks and a ready-made list for user messages
+SUPPORTED_SYMBOLS = frozenset(SYMBOL_TO_ID)
+SUPPORTED_SYMBOLS_TEXT = ", ".join(SYMBOL_TO_ID)
+
 # Cache TTLs
 CACHE_TTL_SECONDS = 900  # 15 minutes - fresh cache
 STALE_CACHE_MAX_AGE = 3600  # 1 hour - fallback stale cache
 
+# In-process cache in front of Redis (one per process: web worker or Celery worker).
+# Shared by the sync and async lookups, hence the thread lock.
+LOCAL_CACHE_TTL_SECONDS = 30
+_local_price_cache = TTLCache(maxsize=64, ttl=LOCAL_CACHE_TTL_SECONDS)
+_local_price_cache_lock = threading.Lock()
+_local_price_locks: Dict[str, asyncio.Lock] = {}
+# Symbol -> future of the batch CoinGecko call currently fetching it
+_inflight_prices: Dict[str, asyncio.Future] = {}
+
+
+def _get_local_price(symbol: str) -> Optional[float]:
+    """Get a price from the in-process cache."""
+    with _local_price_cache_lock:
+        return _local_price_cache.get(symbol)
+
+
+def _set_local_price(symbol: str, price: float):
+    """Store a price in the in-process cache."""
+    with _local_price_cache_lock:
+        _local_price_cache[symbol] = price
+
+# Max concurrent CoinGecko requests from the async handlers (per web worker)
+MAX_CONCURRENT_COINGECKO_CALLS = 8
+_coingecko_semaphore = asyncio.Semaphore(MAX_CONCURRENT_COINGECKO_CALLS)
+
 # Rate limiting
 MIN_SECONDS_BETWEEN_CALLS = 2.5  # Max ~24 calls/minute (safe margin)
 RATE_LIMIT_KEY = "rate_limit:coingecko"
@@ -64,35 +99,80 @@ def is_symbol_supported(symbol: str) -> bool:
     Returns:
         True if supported, False otherwise
     """
-    return symbol.upper() in SYMBOL_TO_ID
+    return symbol.upper() in SUPPORTED_SYMBOLS
 
 
-def _wait_for_rate_limit():
-    """Enforce global rate limit using Redis.
+def _reserve_rate_limit_slot() -> float:
+    """Reserve the next CoinGecko call slot in Redis.
+    
+    Uses a shared timestamp key for distributed rate limiting across all workers.
     
-    Uses Redis INCR + EXPIRE for distributed rate limiting across all workers.
+    Returns:
+        Seconds the caller must wait before making its call
     """
     try:
         # Check last call timestamp in Redis
         last_call = redis_client.get(RATE_LIMIT_KEY)
         
+        now = time.time()
+        sleep_time = 0.0
         if last_call:
-            last_call_time = float(last_call)
-            now = time.time()
-            time_since_last = now - last_call_time
+            time_since_last = now - float(last_call)
             
             if time_since_last < MIN_SECONDS_BETWEEN_CALLS:
                 sleep_time = MIN_SECONDS_BETWEEN_CALLS - time_since_last
-                logger.debug(f"⏳ Rate limit: sleeping {sleep_time:.2f}s")
-                time.sleep(sleep_time)
+                logger.debug("⏳ Rate limit: sleeping %.2fs", sleep_time)
         
-        # Update timestamp in Redis with TTL
-        redis_client.setex(RATE_LIMIT_KEY, 60, str(time.time()))
+        # Store the time our call will actually go out, with TTL
+        redis_client.setex(RATE_LIMIT_KEY, 60, str(now + sleep_time))
+        return sleep_time
         
     except Exception as e:
-        logger.warning(f"⚠️ Rate limit check failed (Redis issue): {e}")
+        logger.warning("⚠️ Rate limit check failed (Redis issue): %s", e)
         # Fallback to simple sleep
-        time.sleep(MIN_SECONDS_BETWEEN_CALLS)
+        return MIN_SECONDS_BETWEEN_CALLS
+
+
+def _wait_for_rate_limit():
+    """Enforce global rate limit using Redis (blocking)."""
+    sleep_time = _reserve_rate_limit_slot()
+    if sleep_time > 0:
+        time.sleep(sleep_time)
+
+
+async def _reserve_rate_limit_slot_async() -> float:
+    """_reserve_rate_limit_slot() on the async Redis client."""
+    try:
+        last_call = await async_redis_client.get(RATE_LIMIT_KEY)
+        
+        now = time.time()
+        sleep_time = 0.0
+        if last_call:
+            time_since_last = now - float(last_call)
+            
+            if time_since_last < MIN_SECONDS_BETWEEN_CALLS:
+                sleep_time = MIN_SECONDS_BETWEEN_CALLS - time_since_last
+                logger.debug("⏳ Rate limit: sleeping %.2fs", sleep_time)
+        
+        await async_redis_client.setex(RATE_LIMIT_KEY, 60, str(now + sleep_time))
+        return sleep_time
+        
+    except Exception as e:
+        logger.warning("⚠️ Rate limit check failed (Redis issue): %s", e)
+        return MIN_SECONDS_BETWEEN_CALLS
+
+
+async def _wait_for_rate_limit_async():
+    """Enforce global rate limit using Redis without blocking the event loop."""
+    sleep_time = await _reserve_rate_limit_slot_async()
+    if sleep_time > 0:
+        await asyncio.sleep(sleep_time)
+
+
+def _decode_cached_price(data) -> tuple[float, float]:
+    """Decode a cached price payload into (price, age_seconds)."""
+    price_data = orjson.loads(data)
+    return price_data["price"], time.time() - price_data["cached_at"]
 
 
 def _get_cached_price(symbol: str) -> Optional[tuple[float, float]]:
@@ -106,18 +186,31 @@ def _get_cached_price(symbol: str) -> Optional[tuple[float, float]]:
         data = redis_client.get(cache_key)
         
         if data:
-            price_data = json.loads(data)
-            price = price_data["price"]
-            cached_at = price_data["cached_at"]
-            age = time.time() - cached_at
-            
-            logger.debug(f"✅ Redis cache hit for {symbol}: ${price:.2f} (age: {age:.0f}s)")
+            price, age = _decode_cached_price(data)
+            logger.debug("✅ Redis cache hit for %s: $%.2f (age: %.0fs)", symbol, price, age)
             return (price, age)
         
         return None
         
     except Exception as e:
-        logger.warning(f"⚠️ Redis cache read failed for {symbol}: {e}")
+        logger.warning("⚠️ Redis cache read failed for %s: %s", symbol, e)
+        return None
+
+
+async def _get_cached_price_async(symbol: str) -> Optional[tuple[float, float]]:
+    """_get_cached_price() on the async Redis client."""
+    try:
+        data = await async_redis_client.get(f"price:{symbol}")
+        
+        if data:
+            price, age = _decode_cached_price(data)
+            logger.debug("✅ Redis cache hit for %s: $%.2f (age: %.0fs)", symbol, price, age)
+            return (price, age)
+        
+        return None
+        
+    except Exception as e:
+        logger.warning("⚠️ Redis cache read failed for %s: %s", symbol, e)
         return None
 
 
@@ -133,16 +226,97 @@ def _set_cached_price(symbol: str, price: float):
             "price": price,
             "cached_at": time.time()
         }
-        redis_client.setex(cache_key, CACHE_TTL_SECONDS, json.dumps(price_data))
+        redis_client.setex(cache_key, CACHE_TTL_SECONDS, orjson.dumps(price_data))
         
         # Stale cache with 1 hour TTL (fallback)
         stale_key = f"price_stale:{symbol}"
-        redis_client.setex(stale_key, STALE_CACHE_MAX_AGE, json.dumps(price_data))
+        redis_client.setex(stale_key, STALE_CACHE_MAX_AGE, orjson.dumps(price_data))
+        
+        logger.debug("💾 Cached %s: $%.2f", symbol, price)
+        
+    except Exception as e:
+        logger.warning("⚠️ Redis cache write failed for %s: %s", symbol, e)
+
+
+async def _set_cached_price_async(symbol: str, price: float):
+    """_set_cached_price() on the async Redis client (fresh + stale keys, one pipeline)."""
+    try:
+        payload = orjson.dumps({"price": price, "cached_at": time.time()})
+        pipe = async_redis_client.pipeline(transaction=False)
+        pipe.setex(f"price:{symbol}", CACHE_TTL_SECONDS, payload)
+        pipe.setex(f"price_stale:{symbol}", STALE_CACHE_MAX_AGE, payload)
+        await pipe.execute()
         
-        logger.debug(f"💾 Cached {symbol}: ${price:.2f}")
+        logger.debug("💾 Cached %s: $%.2f", symbol, price)
         
     except Exception as e:
-        logger.warning(f"⚠️ Redis cache write failed for {symbol}: {e}")
+        logger.warning("⚠️ Redis cache write failed for %s: %s", symbol, e)
+
+
+def _get_cached_prices(symbols: list[str]) -> Dict[str, tuple[float, float]]:
+    """Get several prices from Redis cache with a single MGET.
+    
+    Returns:
+        Dict mapping symbol to (price, age_seconds) for cached symbols only
+    """
+    try:
+        values = redis_client.mget([f"price:{s}" for s in symbols])
+    except Exception as e:
+        logger.warning("⚠️ Redis cache read failed for %s: %s", symbols, e)
+        return {}
+    
+    now = time.time()
+    cached = {}
+    for symbol, data in zip(symbols, values):
+        if data:
+            price_data = orjson.loads(data)
+            cached[symbol] = (price_data["price"], now - price_data["cached_at"])
+    return cached
+
+
+def _set_cached_prices(prices: Dict[str, float]):
+    """Save several prices (fresh + stale keys) to Redis in one pipeline."""
+    try:
+        cached_at = time.time()
+        pipe = redis_client.pipeline(transaction=False)
+        for symbol, price in prices.items():
+            payload = orjson.dumps({"price": price, "cached_at": cached_at})
+            pipe.setex(f"price:{symbol}", CACHE_TTL_SECONDS, payload)
+            pipe.setex(f"price_stale:{symbol}", STALE_CACHE_MAX_AGE, payload)
+        pipe.execute()
+        
+        logger.debug("💾 Cached %s prices", len(prices))
+        
+    except Exception as e:
+        logger.warning("⚠️ Redis cache write failed for %s: %s", list(prices), e)
+
+
+async def _get_cached_prices_async(symbols: list[str]) -> Dict[str, tuple[float, float]]:
+    """_get_cached_prices() on the async Redis client."""
+    try:
+        values = await async_redis_client.mget([f"price:{s}" for s in symbols])
+    except Exception as e:
+        logger.warning("⚠️ Redis cache read failed for %s: %s", symbols, e)
+        return {}
+    
+    return {symbol: _decode_cached_price(data) for symbol, data in zip(symbols, values) if data}
+
+
+async def _set_cached_prices_async(prices: Dict[str, float]):
+    """_set_cached_prices() on the async Redis client."""
+    try:
+        cached_at = time.time()
+        pipe = async_redis_client.pipeline(transaction=False)
+        for symbol, price in prices.items():
+            payload = orjson.dumps({"price": price, "cached_at": cached_at})
+            pipe.setex(f"price:{symbol}", CACHE_TTL_SECONDS, payload)
+            pipe.setex(f"price_stale:{symbol}", STALE_CACHE_MAX_AGE, payload)
+        await pipe.execute()
+        
+        logger.debug("💾 Cached %s prices", len(prices))
+        
+    except Exception as e:
+        logger.warning("⚠️ Redis cache write failed for %s: %s", list(prices), e)
 
 
 def _get_stale_cached_price(symbol: str) -> Optional[tuple[float, float]]:
@@ -156,18 +330,31 @@ def _get_stale_cached_price(symbol: str) -> Optional[tuple[float, float]]:
         data = redis_client.get(stale_key)
         
         if data:
-            price_data = json.loads(data)
-            price = price_data["price"]
-            cached_at = price_data["cached_at"]
-            age = time.time() - cached_at
-            
-            logger.warning(f"⚠️ Using stale cache for {symbol}: ${price:.2f} (age: {age/60:.0f}min)")
+            price, age = _decode_cached_price(data)
+            logger.warning("⚠️ Using stale cache for %s: $%.2f (age: %.0fmin)", symbol, price, age/60)
             return (price, age)
         
         return None
         
     except Exception as e:
-        logger.warning(f"⚠️ Stale cache read failed for {symbol}: {e}")
+        logger.warning("⚠️ Stale cache read failed for %s: %s", symbol, e)
+        return None
+
+
+async def _get_stale_cached_price_async(symbol: str) -> Optional[tuple[float, float]]:
+    """_get_stale_cached_price() on the async Redis client."""
+    try:
+        data = await async_redis_client.get(f"price_stale:{symbol}")
+        
+        if data:
+            price, age = _decode_cached_price(data)
+            logger.warning("⚠️ Using stale cache for %s: $%.2f (age: %.0fmin)", symbol, price, age/60)
+            return (price, age)
+        
+        return None
+        
+    except Exception as e:
+        logger.warning("⚠️ Stale cache read failed for %s: %s", symbol, e)
         return None
 
 
@@ -188,18 +375,23 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
     
     # Validate symbol first
     if not is_symbol_supported(symbol):
-        logger.warning(f"⚠️ Unknown crypto symbol: {symbol}")
+        logger.warning("⚠️ Unknown crypto symbol: %s", symbol)
         return None
     
-    # Check Redis cache first (unless force refresh)
+    # Check in-process then Redis cache first (unless force refresh)
     if not force_refresh:
+        price = _get_local_price(symbol)
+        if price is not None:
+            return price
+        
         cached = _get_cached_price(symbol)
         if cached:
             price, age = cached
             if age < CACHE_TTL_SECONDS:
+                _set_local_price(symbol, price)
                 return price
             else:
-                logger.debug(f"⏰ Cache expired for {symbol} (age: {age:.0f}s), will fetch fresh")
+                logger.debug("⏰ Cache expired for %s (age: %.0fs), will fetch fresh", symbol, age)
     
     # Map symbol to CoinGecko ID
     coin_id = SYMBOL_TO_ID[symbol]
@@ -211,7 +403,7 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
             _wait_for_rate_limit()
             
             url = f"{COINGECKO_API_BASE}/simple/price?ids={coin_id}&vs_currencies=usd"
-            logger.info(f"🔍 Fetching {symbol} price from CoinGecko (attempt {attempt}/{max_retries})...")
+            logger.info("🔍 Fetching %s price from CoinGecko (attempt %s/%s)...", symbol, attempt, max_retries)
             
             req = urllib.request.Request(
                 url,
@@ -222,11 +414,11 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
             )
             
             with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode('utf-8'))
+                data = orjson.loads(response.read())
             
             price = data.get(coin_id, {}).get("usd")
             if price is None:
-                logger.error(f"❌ No price data for {symbol} (coin_id: {coin_id}). Response: {data}")
+                logger.error("❌ No price data for %s (coin_id: %s). Response: %s", symbol, coin_id, data)
                 
                 # Try stale cache on last attempt
                 if attempt == max_retries:
@@ -236,20 +428,21 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
                 
                 return None
             
-            # Update Redis cache
+            # Update Redis and in-process caches
             _set_cached_price(symbol, price)
-            logger.info(f"✅ Fetched price for {symbol}: ${price:,.2f}")
+            _set_local_price(symbol, float(price))
+            logger.info("✅ Fetched price for %s: $%.2f", symbol, price)
             
             return float(price)
             
         except urllib.error.HTTPError as e:
             error_body = e.read().decode('utf-8') if hasattr(e, 'read') else 'No body'
-            logger.error(f"❌ CoinGecko API HTTP error for {symbol} (attempt {attempt}/{max_retries}): {e.code} {e.reason}")
-            logger.error(f"   Response body: {error_body}")
+            logger.error("❌ CoinGecko API HTTP error for %s (attempt %s/%s): %s %s", symbol, attempt, max_retries, e.code, e.reason)
+            logger.error("   Response body: %s", error_body)
             
             # On rate limit (429), use stale cache immediately
             if e.code == 429:
-                logger.warning(f"⚠️ Rate limit hit! Using stale cache if available...")
+                logger.warning("⚠️ Rate limit hit! Using stale cache if available...")
                 stale = _get_stale_cached_price(symbol)
                 if stale:
                     return stale[0]
@@ -257,7 +450,7 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
             # Retry on rate limit (429) or server error (5xx)
             if e.code in [429, 500, 502, 503, 504] and attempt < max_retries:
                 wait_time = 5 * attempt  # Linear backoff: 5s, 10s, 15s
-                logger.info(f"⏳ Retrying in {wait_time}s...")
+                logger.info("⏳ Retrying in %ss...", wait_time)
                 time.sleep(wait_time)
                 continue
             
@@ -269,12 +462,12 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
             return None
             
         except urllib.error.URLError as e:
-            logger.error(f"❌ Network error fetching {symbol} (attempt {attempt}/{max_retries}): {e.reason}")
+            logger.error("❌ Network error fetching %s (attempt %s/%s): %s", symbol, attempt, max_retries, e.reason)
             
             # Retry on network error
             if attempt < max_retries:
                 wait_time = 3 * attempt
-                logger.info(f"⏳ Retrying in {wait_time}s...")
+                logger.info("⏳ Retrying in %ss...", wait_time)
                 time.sleep(wait_time)
                 continue
             
@@ -286,14 +479,12 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
             return None
             
         except Exception as e:
-            logger.error(f"❌ Unexpected error fetching price for {symbol} (attempt {attempt}/{max_retries}): {type(e).__name__}: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("❌ Unexpected error fetching price for %s (attempt %s/%s): %s: %s", symbol, attempt, max_retries, type(e).__name__, e)
             
             # Retry on unexpected error
             if attempt < max_retries:
                 wait_time = 3 * attempt
-                logger.info(f"⏳ Retrying in {wait_time}s...")
+                logger.info("⏳ Retrying in %ss...", wait_time)
                 time.sleep(wait_time)
                 continue
             
@@ -308,6 +499,147 @@ def get_crypto_price(symbol: str, force_refresh: bool = False, max_retries: int
     return None
 
 
+async def get_crypto_price_async(symbol: str, force_refresh: bool = False, max_retries: int = 3) -> Optional[float]:
+    """Async variant of get_crypto_price() for the webhook handlers.
+    
+    Same caching, rate limiting, retry and stale-cache fallback rules, but the
+    CoinGecko request goes through the shared pooled HTTP client, the Redis
+    cache and rate-limit key through the async Redis client, and waits use
+    asyncio.sleep, so the event loop is never blocked.
+    
+    Prices are also kept in a short in-process cache in front of Redis, and
+    concurrent lookups for the same symbol share a single fetch.
+    
+    Args:
+        symbol: Crypto symbol (BTC, ETH, SOL, etc.)
+        force_refresh: Bypass cache and fetch fresh price
+        max_retries: Maximum number of API retry attempts
+        
+    Returns:
+        Price in USD or None if error
+    """
+    symbol = symbol.upper()
+    
+    if not is_symbol_supported(symbol):
+        logger.warning("⚠️ Unknown crypto symbol: %s", symbol)
+        return None
+    
+    if not force_refresh:
+        price = _get_local_price(symbol)
+        if price is not None:
+            return price
+    
+    lock = _local_price_locks.get(symbol)
+    if lock is None:
+        lock = _local_price_locks[symbol] = asyncio.Lock()
+    
+    async with lock:
+        # Another task may have fetched it while we were waiting
+        if not force_refresh:
+            price = _get_local_price(symbol)
+            if price is not None:
+                return price
+        
+        price = await _fetch_crypto_price_async(symbol, force_refresh, max_retries)
+        if price is not None:
+            _set_local_price(symbol, price)
+        return price
+
+
+async def _fetch_crypto_price_async(symbol: str, force_refresh: bool, max_retries: int) -> Optional[float]:
+    """Redis cache + CoinGecko lookup behind get_crypto_price_async()."""
+    if not force_refresh:
+        cached = await _get_cached_price_async(symbol)
+        if cached:
+            price, age = cached
+            if age < CACHE_TTL_SECONDS:
+                return price
+            else:
+                logger.debug("⏰ Cache expired for %s (age: %.0fs), will fetch fresh", symbol, age)
+    
+    coin_id = SYMBOL_TO_ID[symbol]
+    client = get_http_client()
+    
+    for attempt in range(1, max_retries + 1):
+        try:
+            if _coingecko_semaphore.locked():
+                logger.debug("⏳ CoinGecko concurrency limit reached, %s lookup queued", symbol)
+            
+            async with _coingecko_semaphore:
+                await _wait_for_rate_limit_async()
+                
+                logger.info("🔍 Fetching %s price from CoinGecko (attempt %s/%s)...", symbol, attempt, max_retries)
+                response = await client.get(
+                    f"{COINGECKO_API_BASE}/simple/price",
+                    params={"ids": coin_id, "vs_currencies": "usd"},
+                    headers={"Accept": "application/json"},
+                    timeout=10,
+                )
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            
+            price = data.get(coin_id, {}).get("usd")
+            if price is None:
+                logger.error("❌ No price data for %s (coin_id: %s). Response: %s", symbol, coin_id, data)
+                
+                if attempt == max_retries:
+                    stale = await _get_stale_cached_price_async(symbol)
+                    if stale:
+                        return stale[0]
+                
+                return None
+            
+            await _set_cached_price_async(symbol, price)
+            logger.info("✅ Fetched price for %s: $%.2f", symbol, price)
+            
+            return float(price)
+            
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            logger.error("❌ CoinGecko API HTTP error for %s (attempt %s/%s): %s", symbol, attempt, max_retries, status)
+            logger.error("   Response body: %s", e.response.text)
+            
+            # On rate limit (429), use stale cache immediately
+            if status == 429:
+                logger.warning("⚠️ Rate limit hit! Using stale cache if available...")
+                stale = await _get_stale_cached_price_async(symbol)
+                if stale:
+                    return stale[0]
+            
+            # Retry on rate limit (429) or server error (5xx)
+            if status in [429, 500, 502, 503, 504] and attempt < max_retries:
+                wait_time = 5 * attempt  # Linear backoff: 5s, 10s, 15s
+                logger.info("⏳ Retrying in %ss...", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            
+            stale = await _get_stale_cached_price_async(symbol)
+            if stale:
+                return stale[0]
+            
+            return None
+            
+        except Exception as e:
+            if isinstance(e, httpx.TransportError):
+                logger.error("❌ Network error fetching %s (attempt %s/%s): %s", symbol, attempt, max_retries, e)
+            else:
+                logger.exception("❌ Unexpected error fetching price for %s (attempt %s/%s): %s: %s", symbol, attempt, max_retries, type(e).__name__, e)
+            
+            if attempt < max_retries:
+                wait_time = 3 * attempt
+                logger.info("⏳ Retrying in %ss...", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+            
+            stale = await _get_stale_cached_price_async(symbol)
+            if stale:
+                return stale[0]
+            
+            return None
+    
+    return None
+
+
 def get_multiple_prices(symbols: list[str], force_refresh: bool = False) -> Dict[str, Optional[float]]:
     """Get prices for multiple crypto symbols in a SINGLE API call.
     
@@ -328,30 +660,31 @@ def get_multiple_prices(symbols: list[str], force_refresh: bool = False) -> Dict
         logger.warning("⚠️ No valid symbols provided to get_multiple_prices")
         return {}
     
-    logger.info(f"🔍 Fetching prices for {len(valid_symbols)} symbols: {valid_symbols}")
+    logger.info("🔍 Fetching prices for %s symbols: %s", len(valid_symbols), valid_symbols)
     
     # Check Redis cache first if not force refresh
     results = {}
     symbols_to_fetch = []
     
     if not force_refresh:
+        cached_prices = _get_cached_prices(valid_symbols)
         for symbol in valid_symbols:
-            cached = _get_cached_price(symbol)
+            cached = cached_prices.get(symbol)
             if cached:
                 price, age = cached
                 if age < CACHE_TTL_SECONDS:
                     results[symbol] = price
-                    logger.debug(f"✅ Cache hit for {symbol}: ${price:.2f}")
+                    logger.debug("✅ Cache hit for %s: $%.2f", symbol, price)
                 else:
                     symbols_to_fetch.append(symbol)
             else:
                 symbols_to_fetch.append(symbol)
         
         if not symbols_to_fetch:
-            logger.info(f"✅ All {len(valid_symbols)} prices from Redis cache")
+            logger.info("✅ All %s prices from Redis cache", len(valid_symbols))
             return results
         
-        logger.info(f"🔍 Need to fetch {len(symbols_to_fetch)} prices: {symbols_to_fetch}")
+        logger.info("🔍 Need to fetch %s prices: %s", len(symbols_to_fetch), symbols_to_fetch)
         valid_symbols = symbols_to_fetch
     
     # Map to CoinGecko IDs
@@ -371,68 +704,167 @@ def get_multiple_prices(symbols: list[str], force_refresh: bool = False) -> Dict
             },
         )
         
-        logger.info(f"📡 Making CoinGecko API call for {len(valid_symbols)} symbols...")
+        logger.info("📡 Making CoinGecko API call for %s symbols...", len(valid_symbols))
         with urllib.request.urlopen(req, timeout=20) as response:
-            data = json.loads(response.read().decode('utf-8'))
+            data = orjson.loads(response.read())
         
-        logger.info(f"✅ CoinGecko API response received: {len(data)} coins")
+        logger.info("✅ CoinGecko API response received: %s coins", len(data))
         
         # Build result dict
+        fetched = {}
         for symbol in valid_symbols:
             coin_id = SYMBOL_TO_ID[symbol]
             price = data.get(coin_id, {}).get("usd")
             
             if price is not None:
-                results[symbol] = float(price)
-                _set_cached_price(symbol, float(price))
-                logger.info(f"  {symbol}: ${price:,.2f}")
+                results[symbol] = fetched[symbol] = float(price)
+                logger.info("  %s: $%.2f", symbol, price)
             else:
-                logger.warning(f"⚠️ No price for {symbol} in response")
+                logger.warning("⚠️ No price for %s in response", symbol)
                 # Try stale cache
                 stale = _get_stale_cached_price(symbol)
                 if stale:
                     results[symbol] = stale[0]
-                    logger.warning(f"  Using stale cache {symbol}: ${stale[0]:,.2f} (age: {stale[1]/60:.0f}min)")
+                    logger.warning("  Using stale cache %s: $%.2f (age: %.0fmin)", symbol, stale[0], stale[1]/60)
                 else:
                     results[symbol] = None
         
+        if fetched:
+            _set_cached_prices(fetched)
+        
         return results
         
     except urllib.error.HTTPError as e:
         error_body = e.read().decode('utf-8') if hasattr(e, 'read') else 'No body'
-        logger.error(f"❌ CoinGecko API HTTP error: {e.code} {e.reason}")
-        logger.error(f"   Response: {error_body}")
+        logger.error("❌ CoinGecko API HTTP error: %s %s", e.code, e.reason)
+        logger.error("   Response: %s", error_body)
         
         # Fallback to stale cache
-        logger.warning(f"⚠️ Falling back to stale cache for all symbols")
+        logger.warning("⚠️ Falling back to stale cache for all symbols")
         for s in valid_symbols:
             if s not in results:
                 stale = _get_stale_cached_price(s)
                 if stale:
                     results[s] = stale[0]
-                    logger.info(f"  {s}: ${stale[0]:,.2f} (stale cache, age: {stale[1]/60:.0f}min)")
+                    logger.info("  %s: $%.2f (stale cache, age: %.0fmin)", s, stale[0], stale[1]/60)
                 else:
                     results[s] = None
         return results
         
     except Exception as e:
-        logger.error(f"❌ Failed to fetch multiple prices: {type(e).__name__}: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Failed to fetch multiple prices: %s: %s", type(e).__name__, e)
         
         # Fallback to stale cache
-        logger.warning(f"⚠️ Falling back to stale cache for all symbols")
+        logger.warning("⚠️ Falling back to stale cache for all symbols")
         for s in valid_symbols:
             if s not in results:
                 stale = _get_stale_cached_price(s)
                 if stale:
                     results[s] = stale[0]
-                    logger.info(f"  {s}: ${stale[0]:,.2f} (stale cache, age: {stale[1]/60:.0f}min)")
+                    logger.info("  %s: $%.2f (stale cache, age: %.0fmin)", s, stale[0], stale[1]/60)
                 else:
                     results[s] = None
         return results
 
 
+async def get_multiple_prices_async(symbols: list[str]) -> Dict[str, Optional[float]]:
+    """Async variant of get_multiple_prices() for the webhook handlers.
+    
+    Serves what it can from the in-process and Redis caches, then fetches
+    every remaining symbol in ONE CoinGecko call on the shared HTTP client.
+    
+    Args:
+        symbols: List of crypto symbols
+        
+    Returns:
+        Dict mapping symbol to price (None if error)
+    """
+    valid_symbols = [s.upper() for s in symbols if s.upper() in SUPPORTED_SYMBOLS]
+    if not valid_symbols:
+        return {}
+    
+    results = {}
+    missing = []
+    for symbol in valid_symbols:
+        price = _get_local_price(symbol)
+        if price is not None:
+            results[symbol] = price
+        else:
+            missing.append(symbol)
+    
+    if missing:
+        cached_prices = await _get_cached_prices_async(missing)
+        to_fetch = []
+        for symbol in missing:
+            cached = cached_prices.get(symbol)
+            if cached and cached[1] < CACHE_TTL_SECONDS:
+                results[symbol] = cached[0]
+                _set_local_price(symbol, cached[0])
+            else:
+                to_fetch.append(symbol)
+        missing = to_fetch
+    
+    if not missing:
+        return results
+    
+    # Symbols another request is already fetching: wait for that call
+    # instead of sending CoinGecko the same ids again
+    waiting = {s: _inflight_prices[s] for s in missing if s in _inflight_prices}
+    missing = [s for s in missing if s not in waiting]
+    
+    if missing:
+        loop = asyncio.get_running_loop()
+        own = {s: loop.create_future() for s in missing}
+        _inflight_prices.update(own)
+        try:
+            results.update(await _fetch_multiple_prices_async(missing))
+        finally:
+            for symbol, future in own.items():
+                del _inflight_prices[symbol]
+                future.set_result(results.get(symbol))
+    
+    for symbol, future in waiting.items():
+        results[symbol] = await asyncio.shield(future)
+    
+    return results
+
+
+async def _fetch_multiple_prices_async(symbols: list[str]) -> Dict[str, Optional[float]]:
+    """One CoinGecko call for symbols, stale cache for any it doesn't return."""
+    try:
+        async with _coingecko_semaphore:
+            await _wait_for_rate_limit_async()
+            
+            logger.info("📡 Making CoinGecko API call for %s symbols...", len(symbols))
+            response = await get_http_client().get(
+                f"{COINGECKO_API_BASE}/simple/price",
+                params={"ids": ",".join(SYMBOL_TO_ID[s] for s in symbols), "vs_currencies": "usd"},
+                headers={"Accept": "application/json"},
+                timeout=20,
+            )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+    except Exception as e:
+        logger.error("❌ Failed to fetch multiple prices: %s: %s", type(e).__name__, e)
+        data = {}
+    
+    results = {}
+    fetched = {}
+    for symbol in symbols:
+        price = data.get(SYMBOL_TO_ID[symbol], {}).get("usd")
+        if price is not None:
+            results[symbol] = fetched[symbol] = float(price)
+            _set_local_price(symbol, fetched[symbol])
+        else:
+            stale = await _get_stale_cached_price_async(symbol)
+            results[symbol] = stale[0] if stale else None
+    
+    if fetched:
+        await _set_cached_prices_async(fetched)
+    
+    return results
+
+
 def calculate_pnl(avg_buy_price: float, current_price: float) -> float:
     """Calculate profit/loss percentage.
     
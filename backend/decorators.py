@@ -12,11 +12,14 @@ Provides decorators to protect Telegram commands based on user tier:
 Author: Theo Fanget
 Date: 08 February 2026 (Updated)
 """
+import asyncio
 import logging
 from functools import wraps
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from backend.redis_storage import get_alerts_async
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
@@ -51,7 +54,7 @@ def premium_required(func):
             return
         
         # Check if user is premium
-        if not tier_manager.is_premium(user_id):
+        if not await asyncio.to_thread(tier_manager.is_premium, user_id):
             await update.message.reply_text(
                 "🔒 **Feature Premium**\n\n"
                 "Cette fonctionnalité est réservée aux membres Premium.\n\n"
@@ -65,11 +68,11 @@ def premium_required(func):
                 "👉 Tape /subscribe pour souscrire",
                 parse_mode='Markdown'
             )
-            logger.info(f"❌ Premium feature blocked for free user {user_id} in {func.__name__}")
+            logger.info("❌ Premium feature blocked for free user %s in %s", user_id, func.__name__)
             return
         
         # User is premium, execute the function
-        logger.info(f"✅ Premium feature accessed by user {user_id} in {func.__name__}")
+        logger.info("✅ Premium feature accessed by user %s in %s", user_id, func.__name__)
         return await func(update, context)
     
     return wrapper
@@ -105,21 +108,21 @@ def check_rate_limit(func):
             return
         
         # Check if user can analyze
-        can_proceed, message = tier_manager.can_analyze(user_id)
+        can_proceed, message = await asyncio.to_thread(tier_manager.can_analyze, user_id)
         
         if not can_proceed:
             # Limit reached
             await update.message.reply_text(message, parse_mode='Markdown')
-            logger.info(f"❌ Rate limit reached for user {user_id} in {func.__name__}")
+            logger.info("❌ Rate limit reached for user %s in %s", user_id, func.__name__)
             return
         
         # Display counter for free users (informational)
-        if message and tier_manager.is_free(user_id):
+        if message and await asyncio.to_thread(tier_manager.is_free, user_id):
             # Send counter message (non-blocking)
             try:
                 await update.message.reply_text(message)
             except Exception as e:
-                logger.warning(f"Could not send counter message: {e}")
+                logger.warning("Could not send counter message: %s", e)
         
         # Execute the function
         return await func(update, context)
@@ -168,22 +171,23 @@ def check_position_limit(func):
         
         # Get current portfolio
         try:
-            portfolio = portfolio_manager.get_portfolio(
+            portfolio = await asyncio.to_thread(
+                portfolio_manager.get_portfolio,
                 user_id,
                 update.effective_user.username
             )
             current_positions = len(portfolio.get('positions', []))
         except Exception as e:
-            logger.error(f"Error getting portfolio: {e}")
+            logger.error("Error getting portfolio: %s", e)
             current_positions = 0
         
         # Check if user can add position
-        can_add, message = tier_manager.can_add_position(user_id, current_positions)
+        can_add, message = await asyncio.to_thread(tier_manager.can_add_position, user_id, current_positions)
         
         if not can_add:
             # Limit reached
             await update.message.reply_text(message, parse_mode='Markdown')
-            logger.info(f"❌ Position limit reached for user {user_id} ({current_positions}/3)")
+            logger.info("❌ Position limit reached for user %s (%s/3)", user_id, current_positions)
             return
         
         # Execute the function
@@ -223,29 +227,27 @@ def check_alert_limit(func):
         
         # Get current alerts count
         try:
-            # Import redis_storage to get alerts
-            from backend.redis_storage import get_alerts
-            alerts = get_alerts(user_id)
+            alerts = await get_alerts_async(user_id)
             current_alert_count = len(alerts)
         except Exception as e:
-            logger.error(f"Error getting alerts: {e}")
+            logger.error("Error getting alerts: %s", e)
             current_alert_count = 0
         
         # Check if user can set alert
-        can_set, message = tier_manager.can_set_alert(user_id, current_alert_count)
+        can_set, message = await asyncio.to_thread(tier_manager.can_set_alert, user_id, current_alert_count)
         
         if not can_set:
             # Limit reached
             await update.message.reply_text(message, parse_mode='Markdown')
-            logger.info(f"❌ Alert limit reached for user {user_id} ({current_alert_count} cryptos with alerts)")
+            logger.info("❌ Alert limit reached for user %s (%s cryptos with alerts)", user_id, current_alert_count)
             return
         
         # Display info message for free users
-        if message and tier_manager.is_free(user_id):
+        if message and await asyncio.to_thread(tier_manager.is_free, user_id):
             try:
                 await update.message.reply_text(message, parse_mode='Markdown')
             except Exception as e:
-                logger.warning(f"Could not send alert info message: {e}")
+                logger.warning("Could not send alert info message: %s", e)
         
         # Execute the function
         return await func(update, context)
@@ -283,20 +285,20 @@ def check_recommendation_limit(func):
             return
         
         # Check if user can access AI recommendations
-        can_access, message = tier_manager.can_access_ai_recommendations(user_id)
+        can_access, message = await asyncio.to_thread(tier_manager.can_access_ai_recommendations, user_id)
         
         if not can_access:
             # Limit reached
             await update.message.reply_text(message, parse_mode='Markdown')
-            logger.info(f"❌ AI recommendation limit reached for user {user_id}")
+            logger.info("❌ AI recommendation limit reached for user %s", user_id)
             return
         
         # Display counter for free users (informational)
-        if message and tier_manager.is_free(user_id):
+        if message and await asyncio.to_thread(tier_manager.is_free, user_id):
             try:
                 await update.message.reply_text(message)
             except Exception as e:
-                logger.warning(f"Could not send recommendation counter message: {e}")
+                logger.warning("Could not send recommendation counter message: %s", e)
         
         # Execute the function
         return await func(update, context)
@@ -327,10 +329,11 @@ def log_command_usage(func):
         
         # Get tier_manager
         tier_manager = context.bot_data.get('tier_manager')
-        tier = tier_manager.get_user_tier(user_id) if tier_manager else 'unknown'
+        tier = await asyncio.to_thread(tier_manager.get_user_tier, user_id) if tier_manager else 'unknown'
         
         logger.info(
-            f"📊 Command usage: /{command} by user {user_id} (@{username}) [tier: {tier}]"
+            "📊 Command usage: /%s by user %s (@%s) [tier: %s]",
+            command, user_id, username, tier
         )
         
         # Execute the function
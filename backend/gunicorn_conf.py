@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Gunicorn settings for the FastAPI webhook (Dockerfile entrypoint).
+
+Gunicorn supervises Uvicorn workers (restarting one that dies) and lets
+the worker count be raised per deployment with WEB_CONCURRENCY.
+
+The default stays at ONE worker: the Telegram Application, the per-chat
+update locks, the reply cache and the in-process price cache all live in
+the worker process. Extra workers share Redis but not those, so updates of
+one chat may then be handled by two workers at once. Scale out with more
+replicas first; only raise WEB_CONCURRENCY if that trade-off is acceptable.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+# Picks uvloop + httptools automatically when installed (uvicorn[standard])
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Telegram keeps webhook connections open; outlive its idle timeout
+keepalive = 75
+# Long enough for in-flight updates to drain in the shutdown hook
+graceful_timeout = 30
+timeout = 60
+
+# Not preloaded: the async Redis/HTTP clients and the bot Application
+# must be created inside each worker's own event loop, never before fork
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv('LOG_LEVEL', 'info')
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Shared async HTTP client for outbound API calls (Perplexity, CoinGecko).
+
+A single httpx.AsyncClient is kept per process so that requests reuse
+pooled keep-alive connections (multiplexed over HTTP/2 where the API
+supports it) instead of paying a fresh TCP + TLS handshake every time.
+
+The bot creates the client in its FastAPI startup hook and closes it from
+the shutdown hook; Celery tasks and scripts fall back to creating it
+lazily on first use.
+"""
+import logging
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Default timeout is sized for Perplexity; callers can override per request
+HTTP_TIMEOUT_SECONDS = 30.0
+HTTP_CONNECT_TIMEOUT_SECONDS = 5.0
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide async HTTP client, creating it if needed.
+
+    Returns:
+        httpx.AsyncClient: Shared client with connection pooling
+    """
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            headers={"User-Agent": "sentiment-trading-bot/1.0"},
+        )
+        logger.info("🌐 Shared HTTP client created")
+
+    return _client
+
+
+async def close_http_client():
+    """Close the shared HTTP client and release its pooled connections."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("🌐 Shared HTTP client closed")
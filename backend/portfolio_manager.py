@@ -6,28 +6,49 @@ Fast, simple, and reliable alternative to PostgreSQL.
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
+import threading
+from cachetools import TTLCache
 
 try:
     from backend import redis_storage as storage
-    from backend.crypto_prices import get_crypto_price, get_multiple_prices, calculate_pnl, format_price
+    from backend.crypto_prices import get_crypto_price, get_multiple_prices, get_multiple_prices_async, calculate_pnl, format_price
 except ImportError:
     import redis_storage as storage
-    from crypto_prices import get_crypto_price, get_multiple_prices, calculate_pnl, format_price
+    from crypto_prices import get_crypto_price, get_multiple_prices, get_multiple_prices_async, calculate_pnl, format_price
 
 logger = logging.getLogger(__name__)
 
+# Priced portfolios are reused for a couple of seconds so that back-to-back
+# /portfolio and /summary calls share one round of Redis reads + price lookups
+PORTFOLIO_CACHE_TTL_SECONDS = 2
+PORTFOLIO_CACHE_MAX_USERS = 1024
+
 class PortfolioManager:
     """
     Manage user portfolios using Redis.
     Much simpler than PostgreSQL - no sessions, no ORM complexity.
     """
     
-    def _ensure_user(self, user_id: int, username: str = None):
-        """Ensure user profile exists in Redis."""
-        profile = storage.get_user_profile(user_id)
+    def __init__(self):
+        self._portfolio_cache = TTLCache(maxsize=PORTFOLIO_CACHE_MAX_USERS, ttl=PORTFOLIO_CACHE_TTL_SECONDS)
+        self._portfolio_cache_lock = threading.Lock()
+    
+    def invalidate_portfolio_cache(self, user_id: int):
+        """Drop the cached priced portfolio after a position changes or the user is wiped."""
+        with self._portfolio_cache_lock:
+            self._portfolio_cache.pop(user_id, None)
+    
+    def _ensure_user(self, user_id: int, username: str = None) -> Dict:
+        """Ensure user profile exists in Redis and return it."""
+        return self._ensure_profile(user_id, username, storage.get_user_profile(user_id))
+    
+    def _ensure_profile(self, user_id: int, username: Optional[str], profile: Optional[Dict]) -> Dict:
+        """Create the user's profile if the one already read is missing."""
         if not profile:
-            storage.set_user_profile(user_id, username or f"user_{user_id}")
-            logger.info(f"✅ Created new user: {user_id}")
+            profile = {"user_id": user_id, "username": username or f"user_{user_id}"}
+            storage.set_user_profile(user_id, profile["username"])
+            logger.info("✅ Created new user: %s", user_id)
+        return profile
     
     # Portfolio operations
     
@@ -42,9 +63,7 @@ class PortfolioManager:
                 "total_invested": float
             }
         """
-        self._ensure_user(user_id, username)
-        
-        profile = storage.get_user_profile(user_id)
+        profile = self._ensure_user(user_id, username)
         positions = storage.get_all_positions(user_id)
         
         # Calculate total invested
@@ -88,12 +107,57 @@ class PortfolioManager:
                 "total_pnl_usd": float,
                 "total_pnl_percent": float
             }
+        
+        Results are cached per user for PORTFOLIO_CACHE_TTL_SECONDS.
         """
-        self._ensure_user(user_id, username)
+        with self._portfolio_cache_lock:
+            cached = self._portfolio_cache.get(user_id)
+        if cached is not None:
+            return cached
         
-        profile = storage.get_user_profile(user_id)
-        positions = storage.get_all_positions(user_id)
+        portfolio = self._build_portfolio_with_prices(user_id, username)
+        
+        with self._portfolio_cache_lock:
+            self._portfolio_cache[user_id] = portfolio
+        return portfolio
+    
+    async def get_portfolio_with_prices_async(self, user_id: int, username: str = None) -> Dict:
+        """
+        Async get_portfolio_with_prices for the webhook handlers.
         
+        Same result and cache; the profile and positions come from one MGET on
+        the async Redis client and the prices from get_multiple_prices_async,
+        so no worker thread is held while waiting on Redis or CoinGecko.
+        """
+        with self._portfolio_cache_lock:
+            cached = self._portfolio_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
+        profile, positions = await storage.get_profile_and_positions_async(user_id)
+        if not profile:
+            profile = {"user_id": user_id, "username": username or f"user_{user_id}"}
+            await storage.set_user_profile_async(user_id, profile["username"])
+            logger.info("✅ Created new user: %s", user_id)
+        
+        current_prices = await get_multiple_prices_async(list(positions)) if positions else {}
+        portfolio = self._price_portfolio(user_id, profile, positions, current_prices)
+        
+        with self._portfolio_cache_lock:
+            self._portfolio_cache[user_id] = portfolio
+        return portfolio
+    
+    def _build_portfolio_with_prices(self, user_id: int, username: str = None) -> Dict:
+        """Load positions and current prices, then compute P&L (uncached)."""
+        profile = self._ensure_user(user_id, username)
+        positions = storage.get_all_positions(user_id)
+        current_prices = get_multiple_prices(list(positions)) if positions else {}
+        return self._price_portfolio(user_id, profile, positions, current_prices)
+    
+    @staticmethod
+    def _price_portfolio(user_id: int, profile: Dict, positions: Dict[str, Dict],
+                         current_prices: Dict[str, Optional[float]]) -> Dict:
+        """Compute per-position and total P&L from stored positions and prices."""
         if not positions:
             return {
                 "username": profile.get('username', f"user_{user_id}"),
@@ -104,31 +168,29 @@ class PortfolioManager:
                 "total_pnl_percent": 0.0
             }
         
-        # Get symbols and fetch current prices
-        symbols = list(positions.keys())
-        current_prices = get_multiple_prices(symbols)
-        
         # Calculate P&L for each position
         enriched_positions = {}
         total_invested = 0.0
         total_current_value = 0.0
         
         for symbol, pos in positions.items():
+            quantity = pos['quantity']
+            avg_price = pos['avg_price']
             current_price = current_prices.get(symbol)
             
             # Skip if price not available
             if current_price is None:
-                logger.warning(f"No price available for {symbol}")
-                current_price = pos['avg_price']  # Fallback
+                logger.warning("No price available for %s", symbol)
+                current_price = avg_price  # Fallback
             
-            invested = pos['quantity'] * pos['avg_price']
-            current_value = pos['quantity'] * current_price
+            invested = quantity * avg_price
+            current_value = quantity * current_price
             pnl_usd = current_value - invested
-            pnl_percent = calculate_pnl(pos['avg_price'], current_price)
+            pnl_percent = calculate_pnl(avg_price, current_price)
             
             enriched_positions[symbol] = {
-                "quantity": pos['quantity'],
-                "avg_price": pos['avg_price'],
+                "quantity": quantity,
+                "avg_price": avg_price,
                 "current_price": current_price,
                 "invested_value": invested,
                 "current_value": current_value,
@@ -172,8 +234,16 @@ class PortfolioManager:
             }
         """
         portfolio = self.get_portfolio_with_prices(user_id, username)
-        realized_pnl = storage.get_total_realized_pnl(user_id)
-        
+        return self._summarize(portfolio, storage.get_total_realized_pnl(user_id))
+    
+    async def get_enriched_summary_async(self, user_id: int, username: str = None) -> Dict:
+        """Async get_enriched_summary (see get_portfolio_with_prices_async)."""
+        portfolio = await self.get_portfolio_with_prices_async(user_id, username)
+        return self._summarize(portfolio, await storage.get_total_realized_pnl_async(user_id))
+    
+    @staticmethod
+    def _summarize(portfolio: Dict, realized_pnl: float) -> Dict:
+        """Build the enriched summary from a priced portfolio and realized P&L."""
         # Find best/worst performers
         best = None
         worst = None
@@ -212,11 +282,11 @@ class PortfolioManager:
         Returns:
             dict with operation result
         """
-        self._ensure_user(user_id, username)
         symbol = symbol.upper()
         
-        # Check if position exists
-        existing_pos = storage.get_position(user_id, symbol)
+        # Profile check and existing position in one round trip
+        profile, existing_pos = storage.get_profile_and_position(user_id, symbol)
+        self._ensure_profile(user_id, username, profile)
         
         if existing_pos:
             # Accumulate: calculate new average price
@@ -226,19 +296,17 @@ class PortfolioManager:
             new_qty = old_qty + quantity
             new_avg = (old_qty * old_avg + quantity * price) / new_qty
             
-            storage.set_position(user_id, symbol, new_qty, round(new_avg, 2))
             action = "updated"
             final_qty = new_qty
             final_avg = round(new_avg, 2)
         else:
             # New position
-            storage.set_position(user_id, symbol, quantity, price)
             action = "created"
             final_qty = quantity
             final_avg = price
         
-        # Add transaction record
-        storage.add_transaction(user_id, {
+        # Position + transaction record in one pipelined write
+        storage.record_position_change(user_id, symbol, (final_qty, final_avg), {
             "symbol": symbol,
             "action": "BUY",
             "quantity": quantity,
@@ -246,8 +314,11 @@ class PortfolioManager:
             "total_usd": round(quantity * price, 2),
             "source": "manual"
         })
+        # Dropped after the write: this narrows, but doesn't close, the window in
+        # which a read that started before the write re-caches the old portfolio
+        self.invalidate_portfolio_cache(user_id)
         
-        logger.info(f"✅ {action.capitalize()} {symbol} position for user {user_id}")
+        logger.info("✅ %s %s position for user %s", action.capitalize(), symbol, user_id)
         
         return {
             "action": action,
@@ -287,8 +358,8 @@ class PortfolioManager:
         
         # Full removal if quantity not specified
         if quantity is None or quantity >= current_qty:
-            # Add transaction record before deletion
-            storage.add_transaction(user_id, {
+            # Transaction record + deletion in one pipelined write
+            storage.record_position_change(user_id, symbol, None, {
                 "symbol": symbol,
                 "action": "REMOVE",
                 "quantity": current_qty,
@@ -296,9 +367,8 @@ class PortfolioManager:
                 "total_usd": round(current_qty * avg_price, 2),
                 "source": "manual"
             })
-            
-            storage.delete_position(user_id, symbol)
-            logger.info(f"✅ Full removal: {symbol} for user {user_id}")
+            self.invalidate_portfolio_cache(user_id)
+            logger.info("✅ Full removal: %s for user %s", symbol, user_id)
             
             return {
                 "success": True,
@@ -321,10 +391,9 @@ class PortfolioManager:
             }
         
         new_qty = current_qty - quantity
-        storage.set_position(user_id, symbol, new_qty, avg_price)
         
-        # Add transaction
-        storage.add_transaction(user_id, {
+        # Position + transaction record in one pipelined write
+        storage.record_position_change(user_id, symbol, (new_qty, avg_price), {
             "symbol": symbol,
             "action": "PARTIAL_REMOVE",
             "quantity": quantity,
@@ -332,8 +401,9 @@ class PortfolioManager:
             "total_usd": round(quantity * avg_price, 2),
             "source": "manual"
         })
+        self.invalidate_portfolio_cache(user_id)
         
-        logger.info(f"✅ Partial removal: {quantity} {symbol} for user {user_id}")
+        logger.info("✅ Partial removal: %s %s for user %s", quantity, symbol, user_id)
         
         return {
             "success": True,
@@ -392,39 +462,40 @@ class PortfolioManager:
         pnl_realized = (sell_price - buy_price) * quantity
         pnl_percent = calculate_pnl(buy_price, sell_price)
         
-        # Record realized P&L
-        storage.add_realized_pnl(user_id, {
-            "symbol": symbol,
-            "quantity_sold": quantity,
-            "buy_price": buy_price,
-            "sell_price": sell_price,
-            "pnl_realized": round(pnl_realized, 2),
-            "pnl_percent": round(pnl_percent, 2)
-        })
-        
         # Update or remove position
         if quantity >= current_qty:
             # Full sell
-            storage.delete_position(user_id, symbol)
+            position = None
             remaining = 0
         else:
             # Partial sell - keep same avg price
-            new_qty = current_qty - quantity
-            storage.set_position(user_id, symbol, new_qty, buy_price)
-            remaining = new_qty
+            remaining = current_qty - quantity
+            position = (remaining, buy_price)
         
-        # Add transaction
-        storage.add_transaction(user_id, {
-            "symbol": symbol,
-            "action": "SELL",
-            "quantity": quantity,
-            "price": sell_price,
-            "total_usd": round(quantity * sell_price, 2),
-            "pnl": round(pnl_realized, 2),
-            "source": "manual"
-        })
+        # Position, transaction and realized P&L in one pipelined write
+        storage.record_position_change(
+            user_id, symbol, position,
+            transaction={
+                "symbol": symbol,
+                "action": "SELL",
+                "quantity": quantity,
+                "price": sell_price,
+                "total_usd": round(quantity * sell_price, 2),
+                "pnl": round(pnl_realized, 2),
+                "source": "manual"
+            },
+            pnl_record={
+                "symbol": symbol,
+                "quantity_sold": quantity,
+                "buy_price": buy_price,
+                "sell_price": sell_price,
+                "pnl_realized": round(pnl_realized, 2),
+                "pnl_percent": round(pnl_percent, 2)
+            },
+        )
+        self.invalidate_portfolio_cache(user_id)
         
-        logger.info(f"✅ Sold {quantity} {symbol} @ {sell_price} (P&L: {pnl_realized:+.2f}) for user {user_id}")
+        logger.info("✅ Sold %s %s @ %s (P&L: %+.2f) for user %s", quantity, symbol, sell_price, pnl_realized, user_id)
         
         return {
             "success": True,
@@ -467,7 +538,7 @@ class PortfolioManager:
         success = storage.add_transaction(user_id, transaction)
         
         if success:
-            logger.info(f"✅ Added transaction for user {user_id}")
+            logger.info("✅ Added transaction for user %s", user_id)
         
         return success
     
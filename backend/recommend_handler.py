@@ -4,13 +4,73 @@ Feature 4: AI-Powered Trading Recommendations Handler
 Handles /recommend command for personalized trading advice.
 """
 
+import asyncio
 import logging
 import re
+from functools import partial
 from telegram import Update
 from telegram.ext import ContextTypes
 
+try:
+    from backend.crypto_prices import SUPPORTED_SYMBOLS_TEXT
+except ImportError:
+    from crypto_prices import SUPPORTED_SYMBOLS_TEXT
+
 logger = logging.getLogger(__name__)
 
+# Compiled once; these run on every AI response
+_CITATION_RE = re.compile(r'\[\d+\]')
+_MULTI_SPACE_RE = re.compile(r' +')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r' +([.,;:!?])')
+_MD_HEADER_RE = re.compile(r'^#{1,6}\s+(.+)$', flags=re.MULTILINE)
+
+_RECOMMENDATION_EMOJI = {"BUY": "🟢", "SELL": "🔴", "HOLD": "🟡"}
+
+_RECOMMENDATION_DISCLAIMER = (
+    "⚠️ **DISCLAIMER**\n\n"
+    "_This is **informational only**, NOT financial advice._\n\n"
+    "🛑 **Risks:** High volatility, possible total loss\n"
+    "📊 Past performance ≠ future results\n"
+    "🔍 **Always DYOR** \u2014 Consult a licensed advisor\n\n"
+    "_Powered by [Perplexity AI](https://www.perplexity.ai) | `/summary` for full portfolio_"
+)
+
+# Telegram caps a message at 4096 UTF-16 code units
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+_RECOMMENDATION_SEPARATOR = "\n\n════════\n\n"
+
+
+def _telegram_length(text: str) -> int:
+    """Length of text as Telegram counts it (UTF-16 code units)."""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def pack_messages(texts: list, separator: str = _RECOMMENDATION_SEPARATOR,
+                  limit: int = TELEGRAM_MAX_MESSAGE_LENGTH) -> list:
+    """Coalesce consecutive texts into as few Telegram messages as fit.
+    
+    Texts are only joined at their boundaries, never split, so Markdown
+    entities stay intact; a single text over the limit is sent alone.
+    """
+    packed = []
+    current = ""
+    sep_len = _telegram_length(separator)
+    current_len = 0
+    
+    for text in texts:
+        text_len = _telegram_length(text)
+        if current and current_len + sep_len + text_len <= limit:
+            current = f"{current}{separator}{text}"
+            current_len += sep_len + text_len
+        else:
+            if current:
+                packed.append(current)
+            current, current_len = text, text_len
+    
+    if current:
+        packed.append(current)
+    return packed
+
 
 def clean_perplexity_citations(text: str) -> str:
     """
@@ -18,13 +78,13 @@ def clean_perplexity_citations(text: str) -> str:
     Also cleans up extra spaces and improves formatting.
     """
     # Remove citations like [1], [2], [1][2][3], etc.
-    cleaned = re.sub(r'\[\d+\]', '', text)
+    cleaned = _CITATION_RE.sub('', text)
     
     # Remove multiple consecutive spaces
-    cleaned = re.sub(r' +', ' ', cleaned)
+    cleaned = _MULTI_SPACE_RE.sub(' ', cleaned)
     
     # Clean up spaces before punctuation
-    cleaned = re.sub(r' +([.,;:!?])', r'\1', cleaned)
+    cleaned = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', cleaned)
     
     # Remove trailing spaces from lines
     cleaned = '\n'.join(line.rstrip() for line in cleaned.split('\n'))
@@ -41,7 +101,7 @@ def format_ai_analysis(reasoning: str) -> str:
     cleaned = clean_perplexity_citations(reasoning)
     
     # Remove markdown headers (# and ##) and replace with bold
-    cleaned = re.sub(r'^#{1,6}\s+(.+)$', r'**\1**', cleaned, flags=re.MULTILINE)
+    cleaned = _MD_HEADER_RE.sub(r'**\1**', cleaned)
     
     # Split into paragraphs
     paragraphs = [p.strip() for p in cleaned.split('\n\n') if p.strip()]
@@ -71,10 +131,11 @@ async def recommend_command(
     format_price
 ):
     """Get AI-powered trading recommendations for portfolio positions."""
+    reply_md = partial(update.message.reply_text, parse_mode='Markdown')
+    
     if not DB_AVAILABLE:
-        await update.message.reply_text(
-            "⚠️ Database offline. Cannot generate recommendations.", 
-            parse_mode='Markdown'
+        await reply_md(
+            "⚠️ Database offline. Cannot generate recommendations."
         )
         return
     
@@ -86,60 +147,55 @@ async def recommend_command(
     if len(context.args) == 1:
         specific_crypto = context.args[0].upper()
         if not is_symbol_supported(specific_crypto):
-            await update.message.reply_text(
+            await reply_md(
                 f"❌ **{specific_crypto} not supported**\n\n"
-                "Supported cryptos: BTC, ETH, SOL, BNB, XRP, ADA, AVAX, DOT, MATIC, LINK, UNI, ATOM, LTC, BCH, XLM",
-                parse_mode='Markdown'
+                f"Supported cryptos: {SUPPORTED_SYMBOLS_TEXT}"
             )
             return
     elif len(context.args) > 1:
-        await update.message.reply_text(
+        await reply_md(
             "⚠️ **Usage:** `/recommend [SYMBOL]`\n\n"
             "**Examples:**\n"
             "• `/recommend` - Analyze all positions\n"
-            "• `/recommend BTC` - Analyze Bitcoin only",
-            parse_mode='Markdown'
+            "• `/recommend BTC` - Analyze Bitcoin only"
         )
         return
     
-    logger.info(f"🤖 /recommend called by user {user_id} (@{username}), crypto: {specific_crypto or 'ALL'}")
+    logger.info("🤖 /recommend called by user %s (@%s), crypto: %s", user_id, username, specific_crypto or 'ALL')
     
     try:
-        portfolio = portfolio_manager.get_portfolio_with_prices(user_id, username)
+        portfolio = await portfolio_manager.get_portfolio_with_prices_async(user_id, username)
         
         if not portfolio["positions"]:
-            await update.message.reply_text(
+            await reply_md(
                 "💼 **Portfolio Empty**\n\n"
                 "No positions to analyze. Add a position first with:\n"
-                "`/add BTC 1 45000`",
-                parse_mode='Markdown'
+                "`/add BTC 1 45000`"
             )
             return
         
         if specific_crypto:
             if specific_crypto not in portfolio["positions"]:
-                await update.message.reply_text(
+                await reply_md(
                     f"⚠️ **No {specific_crypto} Position**\n\n"
                     f"You don't hold {specific_crypto}. Add it first with:\n"
-                    f"`/add {specific_crypto} <qty> <price>`",
-                    parse_mode='Markdown'
+                    f"`/add {specific_crypto} <qty> <price>`"
                 )
                 return
             positions_to_analyze = {specific_crypto: portfolio["positions"][specific_crypto]}
         else:
             positions_to_analyze = portfolio["positions"]
         
-        analyzing_msg = await update.message.reply_text(
+        analyzing_msg = await reply_md(
             f"🤖 **Analyzing {len(positions_to_analyze)} position(s)...**\n\n"
-            f"_This may take 3-10 seconds_",
-            parse_mode='Markdown'
+            f"_This may take 3-10 seconds_"
         )
         
         try:
             from backend.services.perplexity_client import get_perplexity_client
             perplexity = get_perplexity_client()
         except Exception as e:
-            logger.error(f"❌ Failed to load Perplexity client: {e}")
+            logger.error("❌ Failed to load Perplexity client: %s", e)
             await analyzing_msg.edit_text(
                 "❌ **AI Service Unavailable**\n\n"
                 "Perplexity API is not configured or unavailable.\n"
@@ -159,7 +215,7 @@ async def recommend_command(
                 pnl_percent = pos["pnl_percent"]
                 
                 if not current_price or current_price == 0:
-                    logger.warning(f"Skipping {symbol}: no valid current price")
+                    logger.warning("Skipping %s: no valid current price", symbol)
                     continue
                 
                 position_data = {
@@ -169,7 +225,9 @@ async def recommend_command(
                     "pnl_pct": pnl_percent,
                 }
                 
-                recommendation = perplexity.get_market_recommendation(
+                # Sync HTTP call (up to ~30 s): keep it off the event loop
+                recommendation = await asyncio.to_thread(
+                    perplexity.get_market_recommendation,
                     crypto_symbol=symbol,
                     position_data=position_data,
                 )
@@ -187,22 +245,21 @@ async def recommend_command(
                 })
             
             except Exception as e:
-                logger.error(f"❌ Error generating recommendation for {symbol}: {e}")
+                logger.error("❌ Error generating recommendation for %s: %s", symbol, e)
         
         await analyzing_msg.delete()
         
         if not all_recommendations:
-            await update.message.reply_text(
+            await reply_md(
                 "❌ **Analysis Failed**\n\n"
-                "Could not generate recommendations. Please try again.",
-                parse_mode='Markdown'
+                "Could not generate recommendations. Please try again."
             )
             return
         
-        # Send recommendations with clean formatting
+        # Build recommendations with clean formatting
+        responses = []
         for rec in all_recommendations:
-            emoji_map = {"BUY": "🟢", "SELL": "🔴", "HOLD": "🟡"}
-            rec_emoji = emoji_map.get(rec["recommendation"], "⚪")
+            rec_emoji = _RECOMMENDATION_EMOJI.get(rec["recommendation"], "⚪")
             
             # P&L visual indicators
             pnl_emoji = "🟢" if rec["pnl_percent"] > 0 else ("🔴" if rec["pnl_percent"] < 0 else "⚪")
@@ -212,43 +269,37 @@ async def recommend_command(
             formatted_reasoning = format_ai_analysis(rec["reasoning"])
             
             # Build clean, readable response
-            response = f"{rec_emoji} **AI RECOMMENDATION \u2014 {rec['symbol']}**\n\n"
-            
-            # Position summary
-            response += f"💼 **YOUR POSITION**\n\n"
-            response += f"Quantity: `{rec['qty']:.8g}` {rec['symbol']}\n"
-            response += f"Entry: `{format_price(rec['avg_price'])}` → Current: `{format_price(rec['current_price'])}`\n"
-            response += f"{pnl_emoji} **{pnl_label}:** `{rec['pnl_usd']:+,.2f} USD` _({rec['pnl_percent']:+.2f}%)_\n\n"
-            
-            # Recommendation
-            response += f"🎯 **RECOMMENDATION: {rec['recommendation']}**\n"
-            response += f"🔒 _Confidence: {rec['confidence']}%_\n\n"
-            
-            response += f"────────\n\n"
-            
-            # AI Analysis
-            response += f"🤖 **AI ANALYSIS**\n\n{formatted_reasoning}\n\n"
-            
-            response += f"────────\n\n"
-            
-            # Disclaimer
-            response += f"⚠️ **DISCLAIMER**\n\n"
-            response += f"_This is **informational only**, NOT financial advice._\n\n"
-            response += f"🛑 **Risks:** High volatility, possible total loss\n"
-            response += f"📊 Past performance ≠ future results\n"
-            response += f"🔍 **Always DYOR** \u2014 Consult a licensed advisor\n\n"
-            response += f"_Powered by [Perplexity AI](https://www.perplexity.ai) | `/summary` for full portfolio_"
-            
-            await update.message.reply_text(response, parse_mode='Markdown', disable_web_page_preview=True)
+            responses.append(
+                f"{rec_emoji} **AI RECOMMENDATION \u2014 {rec['symbol']}**\n\n"
+                
+                # Position summary
+                "💼 **YOUR POSITION**\n\n"
+                f"Quantity: `{rec['qty']:.8g}` {rec['symbol']}\n"
+                f"Entry: `{format_price(rec['avg_price'])}` → Current: `{format_price(rec['current_price'])}`\n"
+                f"{pnl_emoji} **{pnl_label}:** `{rec['pnl_usd']:+,.2f} USD` _({rec['pnl_percent']:+.2f}%)_\n\n"
+                
+                # Recommendation
+                f"🎯 **RECOMMENDATION: {rec['recommendation']}**\n"
+                f"🔒 _Confidence: {rec['confidence']}%_\n\n"
+                "────────\n\n"
+                
+                # AI Analysis
+                f"🤖 **AI ANALYSIS**\n\n{formatted_reasoning}\n\n"
+                "────────\n\n"
+                
+                # Disclaimer
+                f"{_RECOMMENDATION_DISCLAIMER}"
+            )
+        
+        # Several positions share a message when they fit: fewer sendMessage calls
+        for message in pack_messages(responses):
+            await reply_md(message, disable_web_page_preview=True)
         
-        logger.info(f"✅ /recommend sent {len(all_recommendations)} recommendation(s) to {user_id}")
+        logger.info("✅ /recommend sent %d recommendation(s) to %s", len(all_recommendations), user_id)
     
     except Exception as e:
-        logger.error(f"❌ /recommend error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
-        await update.message.reply_text(
+        logger.exception("❌ /recommend error: %s", e)
+        await reply_md(
             "❌ **Error Generating Recommendations**\n\n"
-            "Something went wrong. Please try again.",
-            parse_mode='Markdown'
+            "Something went wrong. Please try again."
         )
@@ -4,9 +4,13 @@ Redis storage layer for portfolio management.
 Simple, fast, and reliable alternative to PostgreSQL on Railway.
 """
 import os
-import json
+import asyncio
+import hashlib
+import secrets
+import orjson
 import redis
-from typing import Dict, List, Optional
+import redis.asyncio as aioredis
+from typing import Awaitable, Callable, Dict, List, Optional
 from datetime import datetime
 import logging
 
@@ -18,19 +22,43 @@ REDIS_URL = os.getenv('REDIS_URL')
 if not REDIS_URL:
     raise ValueError("REDIS_URL environment variable not set!")
 
+# Upper bound on sockets shared by the bot's worker threads and Celery tasks
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+
 # Create Redis client
 try:
-    redis_client = redis.from_url(
+    # A blocking pool makes bursts wait briefly for a free connection instead
+    # of failing with "Too many connections" once the cap is reached
+    redis_pool = redis.BlockingConnectionPool.from_url(
         REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=5,  # Max wait for a free pooled connection
         decode_responses=True,  # Auto-decode bytes to strings
         socket_connect_timeout=5,
         socket_timeout=5,
+        socket_keepalive=True,
+        retry_on_timeout=True,
+        health_check_interval=30
+    )
+    redis_client = redis.Redis(connection_pool=redis_pool)
+    
+    # Same settings for the bot's event loop; commands await a pooled
+    # connection instead of blocking the loop for a full round trip
+    async_redis_pool = aioredis.BlockingConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=5,
+        decode_responses=True,
+        socket_connect_timeout=5,
+        socket_timeout=5,
+        socket_keepalive=True,
         retry_on_timeout=True,
         health_check_interval=30
     )
-    logger.info(f"🔥 Connected to Redis: {REDIS_URL.split('@')[1] if '@' in REDIS_URL else 'railway'}")
+    async_redis_client = aioredis.Redis(connection_pool=async_redis_pool)
+    logger.info("🔥 Connected to Redis: %s", REDIS_URL.split('@')[1] if '@' in REDIS_URL else 'railway')
 except Exception as e:
-    logger.error(f"❌ Redis connection failed: {e}")
+    logger.error("❌ Redis connection failed: %s", e)
     raise
 
 
@@ -80,7 +108,7 @@ class RedisStorage:
             
             return user_ids
         except Exception as e:
-            logger.error(f"Error getting all user IDs: {e}")
+            logger.error("Error getting all user IDs: %s", e)
             return []
     
     def get_portfolio(self, user_id: int) -> Dict[str, Dict]:
@@ -92,6 +120,10 @@ class RedisStorage:
         """
         return get_all_positions(user_id)
     
+    def get_all_portfolios(self) -> Dict[int, Dict[str, Dict]]:
+        """Get every user's positions in one sweep (alias for get_all_positions_by_user)."""
+        return get_all_positions_by_user()
+    
     def get_position(self, user_id: int, symbol: str) -> Optional[Dict]:
         """Get a specific position."""
         return get_position(user_id, symbol)
@@ -138,9 +170,9 @@ def get_user_profile(user_id: int) -> Optional[Dict]:
     """Get user profile from Redis."""
     try:
         data = redis_client.get(f"user:{user_id}:profile")
-        return json.loads(data) if data else None
+        return orjson.loads(data) if data else None
     except Exception as e:
-        logger.error(f"Error getting user profile: {e}")
+        logger.error("Error getting user profile: %s", e)
         return None
 
 def set_user_profile(user_id: int, username: str) -> bool:
@@ -150,38 +182,53 @@ def set_user_profile(user_id: int, username: str) -> bool:
     """
     try:
         profile = {"user_id": user_id, "username": username}
-        redis_client.set(f"user:{user_id}:profile", json.dumps(profile))
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(f"user:{user_id}:profile", orjson.dumps(profile))
         
         # Add to global users set (for admin dashboard)
-        redis_client.sadd("users:all", str(user_id))
+        pipe.sadd("users:all", str(user_id))
+        pipe.execute()
         
         return True
     except Exception as e:
-        logger.error(f"Error setting user profile: {e}")
+        logger.error("Error setting user profile: %s", e)
         return False
 
 def get_position(user_id: int, symbol: str) -> Optional[Dict]:
     """Get a specific position for a user."""
     try:
         data = redis_client.get(f"user:{user_id}:positions:{symbol}")
-        return json.loads(data) if data else None
+        return orjson.loads(data) if data else None
     except Exception as e:
-        logger.error(f"Error getting position: {e}")
+        logger.error("Error getting position: %s", e)
         return None
 
+def get_profile_and_position(user_id: int, symbol: str) -> tuple:
+    """Get a user's profile and one position in a single MGET.
+    
+    Returns:
+        Tuple (profile dict or None, position dict or None)
+    """
+    try:
+        profile, position = redis_client.mget(
+            f"user:{user_id}:profile",
+            f"user:{user_id}:positions:{symbol}",
+        )
+        return (
+            orjson.loads(profile) if profile else None,
+            orjson.loads(position) if position else None,
+        )
+    except Exception as e:
+        logger.error("Error getting profile and position: %s", e)
+        return None, None
+
 def set_position(user_id: int, symbol: str, quantity: float, avg_price: float) -> bool:
     """Save/update a position for a user."""
     try:
-        position = {
-            "symbol": symbol,
-            "quantity": quantity,
-            "avg_price": avg_price,
-            "updated_at": datetime.utcnow().isoformat()
-        }
-        redis_client.set(f"user:{user_id}:positions:{symbol}", json.dumps(position))
+        redis_client.set(f"user:{user_id}:positions:{symbol}", _position_record(symbol, quantity, avg_price))
         return True
     except Exception as e:
-        logger.error(f"Error setting position: {e}")
+        logger.error("Error setting position: %s", e)
         return False
 
 def delete_position(user_id: int, symbol: str) -> bool:
@@ -190,60 +237,92 @@ def delete_position(user_id: int, symbol: str) -> bool:
         redis_client.delete(f"user:{user_id}:positions:{symbol}")
         return True
     except Exception as e:
-        logger.error(f"Error deleting position: {e}")
+        logger.error("Error deleting position: %s", e)
         return False
 
+def _get_by_symbol(pattern: str) -> Dict[str, Dict]:
+    """SCAN one user's per-symbol keys, then read them all with one MGET.
+    
+    SCAN walks the keyspace incrementally instead of blocking Redis the way
+    KEYS does, and the MGET replaces one GET round trip per key.
+    """
+    keys = list(redis_client.scan_iter(match=pattern, count=100))
+    if not keys:
+        return {}
+    return _decode_by_symbol(keys, redis_client.mget(keys))
+
+def _decode_by_symbol(keys: List[str], values: List[Optional[str]]) -> Dict[str, Dict]:
+    """Map 'user:<id>:<kind>:<SYMBOL>' keys to their decoded JSON values."""
+    return {
+        key.split(':')[-1]: orjson.loads(value)
+        for key, value in zip(keys, values) if value
+    }
+
 def get_all_positions(user_id: int) -> Dict[str, Dict]:
     """Get all positions for a user."""
     try:
-        pattern = f"user:{user_id}:positions:*"
-        keys = redis_client.keys(pattern)
-        
-        positions = {}
-        for key in keys:
-            # Extract symbol from key: user:123:positions:BTC -> BTC
-            symbol = key.split(':')[-1]
-            data = redis_client.get(key)
-            if data:
-                positions[symbol] = json.loads(data)
-        
-        return positions
+        return _get_by_symbol(f"user:{user_id}:positions:*")
     except Exception as e:
-        logger.error(f"Error getting all positions: {e}")
+        logger.error("Error getting all positions: %s", e)
         return {}
 
+def get_all_positions_by_user(batch_size: int = 500) -> Dict[int, Dict[str, Dict]]:
+    """Get ALL positions from all users (for Celery worker).
+    
+    One SCAN over the position keys plus one MGET per batch, instead of a
+    KEYS + GET-per-key round trip for every user.
+    
+    A malformed key or corrupt value is logged and skipped on its own, so
+    one bad record can't hide every other user's positions.
+    
+    Returns:
+        Dict: {user_id: {symbol: position_data}}
+    
+    Raises:
+        redis.exceptions.RedisError: if Redis can't be read, so callers can
+            tell an outage apart from an empty keyspace
+    """
+    all_positions = {}
+    keys = list(redis_client.scan_iter(match="user:*:positions:*", count=batch_size))
+    
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        for key, data in zip(batch, redis_client.mget(batch)):
+            parts = key.split(':')
+            if len(parts) < 4 or not data:
+                continue
+            try:
+                all_positions.setdefault(int(parts[1]), {})[parts[3]] = orjson.loads(data)
+            except ValueError as e:  # Non-numeric user id or invalid JSON
+                logger.warning("Skipping bad position key %s: %s", key, e)
+    
+    return all_positions
+
 def add_transaction(user_id: int, transaction: Dict) -> bool:
     """Add a transaction to user's history."""
     try:
         # Get current transactions
         data = redis_client.get(f"user:{user_id}:transactions")
-        transactions = json.loads(data) if data else []
         
         # Add new transaction with timestamp
         transaction['timestamp'] = datetime.utcnow().isoformat()
-        transactions.append(transaction)
-        
-        # Keep only last 100 transactions (memory management)
-        if len(transactions) > 100:
-            transactions = transactions[-100:]
         
-        # Save back
-        redis_client.set(f"user:{user_id}:transactions", json.dumps(transactions))
+        redis_client.set(f"user:{user_id}:transactions", _append_capped(data, transaction))
         return True
     except Exception as e:
-        logger.error(f"Error adding transaction: {e}")
+        logger.error("Error adding transaction: %s", e)
         return False
 
 def get_transactions(user_id: int, limit: int = 10) -> List[Dict]:
     """Get user's recent transactions."""
     try:
         data = redis_client.get(f"user:{user_id}:transactions")
-        transactions = json.loads(data) if data else []
+        transactions = orjson.loads(data) if data else []
         
         # Return last N transactions (most recent first)
         return transactions[-limit:][::-1]
     except Exception as e:
-        logger.error(f"Error getting transactions: {e}")
+        logger.error("Error getting transactions: %s", e)
         return []
 
 def add_realized_pnl(user_id: int, pnl_record: Dict) -> bool:
@@ -261,25 +340,79 @@ def add_realized_pnl(user_id: int, pnl_record: Dict) -> bool:
     """
     try:
         data = redis_client.get(f"user:{user_id}:realized_pnl")
-        records = json.loads(data) if data else []
         
         # Add timestamp if not provided
         if 'date' not in pnl_record:
             pnl_record['date'] = datetime.utcnow().isoformat()
         
-        records.append(pnl_record)
+        redis_client.set(f"user:{user_id}:realized_pnl", _append_capped(data, pnl_record))
+        logger.info("✅ Realized P&L recorded: %s %+.2f USD", pnl_record['symbol'], pnl_record['pnl_realized'])
+        return True
+    except Exception as e:
+        logger.error("Error adding realized P&L: %s", e)
+        return False
+
+def record_position_change(user_id: int, symbol: str, position: Optional[tuple], transaction: Dict,
+                           pnl_record: Optional[Dict] = None) -> bool:
+    """Apply a position mutation and its history entries in two round trips.
+    
+    The transaction (and realized P&L) lists are read with one MGET, then
+    the position write/delete and the updated lists go out in a single
+    MULTI/EXEC, instead of a GET + SET per key.
+    
+    Args:
+        position: (quantity, avg_price) to store, or None to delete the position
+        transaction: Entry appended to the transaction history
+        pnl_record: Optional entry appended to the realized P&L records
+    
+    Returns:
+        True if all writes succeeded
+    """
+    try:
+        transactions_key = f"user:{user_id}:transactions"
+        pnl_key = f"user:{user_id}:realized_pnl"
+        now = datetime.utcnow().isoformat()
         
-        # Keep last 100 records
-        if len(records) > 100:
-            records = records[-100:]
+        if pnl_record is None:
+            transactions, records = redis_client.get(transactions_key), None
+        else:
+            transactions, records = redis_client.mget(transactions_key, pnl_key)
         
-        redis_client.set(f"user:{user_id}:realized_pnl", json.dumps(records))
-        logger.info(f"✅ Realized P&L recorded: {pnl_record['symbol']} {pnl_record['pnl_realized']:+.2f} USD")
+        pipe = redis_client.pipeline(transaction=True)
+        position_key = f"user:{user_id}:positions:{symbol}"
+        if position is None:
+            pipe.delete(position_key)
+        else:
+            pipe.set(position_key, _position_record(symbol, *position))
+        
+        transaction['timestamp'] = now
+        pipe.set(transactions_key, _append_capped(transactions, transaction))
+        
+        if pnl_record is not None:
+            pnl_record.setdefault('date', now)
+            pipe.set(pnl_key, _append_capped(records, pnl_record))
+        
+        pipe.execute()
         return True
     except Exception as e:
-        logger.error(f"Error adding realized P&L: {e}")
+        logger.error("Error recording position change: %s", e)
         return False
 
+def _position_record(symbol: str, quantity: float, avg_price: float) -> bytes:
+    """Serialized position value as stored under user:{id}:positions:{symbol}."""
+    return orjson.dumps({
+        "symbol": symbol,
+        "quantity": quantity,
+        "avg_price": avg_price,
+        "updated_at": datetime.utcnow().isoformat()
+    })
+
+def _append_capped(data: Optional[str], entry: Dict, limit: int = 100) -> bytes:
+    """Append entry to a stored JSON list, keeping only the last `limit` items."""
+    items = orjson.loads(data) if data else []
+    items.append(entry)
+    return orjson.dumps(items[-limit:])
+
 def get_realized_pnl(user_id: int, symbol: str = None) -> List[Dict]:
     """Get realized P&L records.
     
@@ -292,14 +425,14 @@ def get_realized_pnl(user_id: int, symbol: str = None) -> List[Dict]:
     """
     try:
         data = redis_client.get(f"user:{user_id}:realized_pnl")
-        records = json.loads(data) if data else []
+        records = orjson.loads(data) if data else []
         
         if symbol:
             records = [r for r in records if r['symbol'] == symbol.upper()]
         
         return records
     except Exception as e:
-        logger.error(f"Error getting realized P&L: {e}")
+        logger.error("Error getting realized P&L: %s", e)
         return []
 
 def get_total_realized_pnl(user_id: int) -> float:
@@ -312,7 +445,7 @@ def get_total_realized_pnl(user_id: int) -> float:
         records = get_realized_pnl(user_id)
         return sum(r.get('pnl_realized', 0) for r in records)
     except Exception as e:
-        logger.error(f"Error calculating total realized P&L: {e}")
+        logger.error("Error calculating total realized P&L: %s", e)
         return 0.0
 
 
@@ -335,53 +468,56 @@ def set_alert(user_id: int, symbol: str, tp: Optional[float] = None, sl: Optiona
     try:
         symbol = symbol.upper()
         
-        # Get existing alert if any
-        existing_alert = get_alert(user_id, symbol)
-        
-        # Prepare new alert structure
-        if existing_alert and update_only:
-            # Update mode: keep existing values, only update provided ones
-            alert = existing_alert.copy()
-            if tp is not None:
-                alert["tp"] = tp
-            if sl is not None:
-                alert["sl"] = sl
-            alert["updated_at"] = datetime.utcnow().isoformat()
-        else:
-            # Create new or replace mode
-            alert = {
-                "symbol": symbol,
-                "tp": tp,
-                "sl": sl,
-                "created_at": datetime.utcnow().isoformat()
-            }
-        
-        # Validate at least one alert is set
-        if alert.get("tp") is None and alert.get("sl") is None:
-            return {
-                "success": False,
-                "message": "At least one alert (TP or SL) must be set",
-                "requires_confirmation": False
-            }
+        # Merge into the existing alert, if any
+        alert = _build_alert(get_alert(user_id, symbol), symbol, tp, sl, update_only)
+        if alert is None:
+            return _alert_result(False, "At least one alert (TP or SL) must be set")
         
         # Save to Redis
-        redis_client.set(f"user:{user_id}:alerts:{symbol}", json.dumps(alert))
-        logger.info(f"✅ Alert set: User {user_id} - {symbol} (TP: {alert.get('tp')}, SL: {alert.get('sl')})")
+        redis_client.set(f"user:{user_id}:alerts:{symbol}", orjson.dumps(alert))
+        logger.info("✅ Alert set: User %s - %s (TP: %s, SL: %s)", user_id, symbol, alert.get('tp'), alert.get('sl'))
         
-        return {
-            "success": True,
-            "message": "Alert set successfully",
-            "alert": alert,
-            "requires_confirmation": False
-        }
+        return _alert_result(True, "Alert set successfully", alert)
         
     except Exception as e:
-        logger.error(f"Error setting alert: {e}")
-        return {
-            "success": False,
-            "message": f"Error: {str(e)}",
-            "requires_confirmation": False
+        logger.error("Error setting alert: %s", e)
+        return _alert_result(False, f"Error: {str(e)}")
+
+def _build_alert(existing_alert: Optional[Dict], symbol: str, tp: Optional[float],
+                 sl: Optional[float], update_only: bool) -> Optional[Dict]:
+    """Merge new TP/SL values into an alert, or None if neither is set."""
+    if existing_alert and update_only:
+        # Update mode: keep existing values, only update provided ones
+        alert = existing_alert.copy()
+        if tp is not None:
+            alert["tp"] = tp
+        if sl is not None:
+            alert["sl"] = sl
+        alert["updated_at"] = datetime.utcnow().isoformat()
+    else:
+        # Create new or replace mode
+        alert = {
+            "symbol": symbol,
+            "tp": tp,
+            "sl": sl,
+            "created_at": datetime.utcnow().isoformat()
         }
+    
+    # Validate at least one alert is set
+    if alert.get("tp") is None and alert.get("sl") is None:
+        return None
+    return alert
+
+def _alert_result(success: bool, message: str, alert: Optional[Dict] = None) -> Dict:
+    """Build the dict returned by set_alert / set_alert_async."""
+    result = {
+        "success": success,
+        "message": message,
+        "requires_confirmation": False
+    }
+    if alert is not None:
+        result["alert"] = alert
+    return result
 
 def get_alerts(user_id: int) -> Dict[str, Dict]:
     """Get all active alerts for a user.
@@ -390,19 +526,9 @@ def get_alerts(user_id: int) -> Dict[str, Dict]:
         Dict with symbol as key and alert data as value
     """
     try:
-        pattern = f"user:{user_id}:alerts:*"
-        keys = redis_client.keys(pattern)
-        
-        alerts = {}
-        for key in keys:
-            symbol = key.split(':')[-1]
-            data = redis_client.get(key)
-            if data:
-                alerts[symbol] = json.loads(data)
-        
-        return alerts
+        return _get_by_symbol(f"user:{user_id}:alerts:*")
     except Exception as e:
-        logger.error(f"Error getting alerts: {e}")
+        logger.error("Error getting alerts: %s", e)
         return {}
 
 def get_alert(user_id: int, symbol: str) -> Optional[Dict]:
@@ -413,9 +539,9 @@ def get_alert(user_id: int, symbol: str) -> Optional[Dict]:
     """
     try:
         data = redis_client.get(f"user:{user_id}:alerts:{symbol.upper()}")
-        return json.loads(data) if data else None
+        return orjson.loads(data) if data else None
     except Exception as e:
-        logger.error(f"Error getting alert: {e}")
+        logger.error("Error getting alert: %s", e)
         return None
 
 def remove_alert(user_id: int, symbol: str) -> bool:
@@ -427,13 +553,13 @@ def remove_alert(user_id: int, symbol: str) -> bool:
     try:
         result = redis_client.delete(f"user:{user_id}:alerts:{symbol.upper()}")
         if result > 0:
-            logger.info(f"✅ Alert removed: User {user_id} - {symbol}")
+            logger.info("✅ Alert removed: User %s - %s", user_id, symbol)
             return True
         else:
-            logger.warning(f"⚠️ No alert found: User {user_id} - {symbol}")
+            logger.warning("⚠️ No alert found: User %s - %s", user_id, symbol)
             return False
     except Exception as e:
-        logger.error(f"Error removing alert: {e}")
+        logger.error("Error removing alert: %s", e)
         return False
 
 def get_all_alerts() -> Dict[int, Dict[str, Dict]]:
@@ -457,14 +583,269 @@ def get_all_alerts() -> Dict[int, Dict[str, Dict]]:
                 if data:
                     if user_id not in all_alerts:
                         all_alerts[user_id] = {}
-                    all_alerts[user_id][symbol] = json.loads(data)
+                    all_alerts[user_id][symbol] = orjson.loads(data)
         
         return all_alerts
     except Exception as e:
-        logger.error(f"Error getting all alerts: {e}")
+        logger.error("Error getting all alerts: %s", e)
         return {}
 
 
+# ===== ASYNC API (bot event loop) =====
+# Same semantics as the sync functions above, on redis.asyncio so the
+# Telegram handlers never block the event loop on a Redis round trip.
+# The sync versions stay for Celery tasks and scripts.
+
+async def get_profile_and_positions_async(user_id: int) -> tuple:
+    """Profile and all positions of a user: SCAN the position keys, then one MGET.
+    
+    Returns:
+        Tuple (profile or None, {symbol: position_data})
+    """
+    try:
+        keys = [key async for key in async_redis_client.scan_iter(match=f"user:{user_id}:positions:*", count=100)]
+        profile, *positions = await async_redis_client.mget(f"user:{user_id}:profile", *keys)
+        return (orjson.loads(profile) if profile else None), _decode_by_symbol(keys, positions)
+    except Exception as e:
+        logger.error("Error getting profile and positions: %s", e)
+        return None, {}
+
+async def set_user_profile_async(user_id: int, username: str) -> bool:
+    """Async set_user_profile."""
+    try:
+        profile = {"user_id": user_id, "username": username}
+        pipe = async_redis_client.pipeline(transaction=False)
+        pipe.set(f"user:{user_id}:profile", orjson.dumps(profile))
+        pipe.sadd("users:all", str(user_id))
+        await pipe.execute()
+        return True
+    except Exception as e:
+        logger.error("Error setting user profile: %s", e)
+        return False
+
+async def get_total_realized_pnl_async(user_id: int) -> float:
+    """Async get_total_realized_pnl."""
+    try:
+        data = await async_redis_client.get(f"user:{user_id}:realized_pnl")
+        records = orjson.loads(data) if data else []
+        return sum(r.get('pnl_realized', 0) for r in records)
+    except Exception as e:
+        logger.error("Error calculating total realized P&L: %s", e)
+        return 0.0
+
+async def get_alerts_async(user_id: int) -> Dict[str, Dict]:
+    """Async get_alerts: SCAN the user's alert keys, then one MGET."""
+    try:
+        keys = [key async for key in async_redis_client.scan_iter(match=f"user:{user_id}:alerts:*", count=100)]
+        if not keys:
+            return {}
+        return _decode_by_symbol(keys, await async_redis_client.mget(keys))
+    except Exception as e:
+        logger.error("Error getting alerts: %s", e)
+        return {}
+
+async def get_alert_async(user_id: int, symbol: str) -> Optional[Dict]:
+    """Async get_alert."""
+    try:
+        data = await async_redis_client.get(f"user:{user_id}:alerts:{symbol.upper()}")
+        return orjson.loads(data) if data else None
+    except Exception as e:
+        logger.error("Error getting alert: %s", e)
+        return None
+
+async def get_position_and_alert_async(user_id: int, symbol: str) -> tuple:
+    """Get a user's position and alert for one symbol in a single MGET.
+    
+    Returns:
+        Tuple (position dict or None, alert dict or None)
+    """
+    try:
+        position, alert = await async_redis_client.mget(
+            f"user:{user_id}:positions:{symbol}",
+            f"user:{user_id}:alerts:{symbol.upper()}",
+        )
+        return (
+            orjson.loads(position) if position else None,
+            orjson.loads(alert) if alert else None,
+        )
+    except Exception as e:
+        logger.error("Error getting position and alert: %s", e)
+        return None, None
+
+async def set_alert_async(user_id: int, symbol: str, tp: Optional[float] = None, sl: Optional[float] = None, update_only: bool = False) -> Dict:
+    """Async set_alert. Same arguments and return value."""
+    try:
+        symbol = symbol.upper()
+        
+        alert = _build_alert(await get_alert_async(user_id, symbol), symbol, tp, sl, update_only)
+        if alert is None:
+            return _alert_result(False, "At least one alert (TP or SL) must be set")
+        
+        await async_redis_client.set(f"user:{user_id}:alerts:{symbol}", orjson.dumps(alert))
+        logger.info("✅ Alert set: User %s - %s (TP: %s, SL: %s)", user_id, symbol, alert.get('tp'), alert.get('sl'))
+        
+        return _alert_result(True, "Alert set successfully", alert)
+        
+    except Exception as e:
+        logger.error("Error setting alert: %s", e)
+        return _alert_result(False, f"Error: {str(e)}")
+
+async def remove_alert_async(user_id: int, symbol: str) -> bool:
+    """Async remove_alert."""
+    try:
+        result = await async_redis_client.delete(f"user:{user_id}:alerts:{symbol.upper()}")
+        if result > 0:
+            logger.info("✅ Alert removed: User %s - %s", user_id, symbol)
+            return True
+        else:
+            logger.warning("⚠️ No alert found: User %s - %s", user_id, symbol)
+            return False
+    except Exception as e:
+        logger.error("Error removing alert: %s", e)
+        return False
+
+def _decode_snapshot(position_keys: List[str], alert_keys: List[str], replies: List, transactions_limit: int) -> Dict:
+    """Decode the pipeline replies of a user snapshot read."""
+    profile, transactions, realized_pnl = replies[:3]
+    position_values = replies[3] if position_keys else []
+    alert_values = replies[-1] if alert_keys else []
+    
+    transactions = orjson.loads(transactions) if transactions else []
+    return {
+        "profile": orjson.loads(profile) if profile else None,
+        "positions": _decode_by_symbol(position_keys, position_values),
+        "alerts": _decode_by_symbol(alert_keys, alert_values),
+        "transactions": transactions[-transactions_limit:][::-1],
+        "realized_pnl": orjson.loads(realized_pnl) if realized_pnl else [],
+    }
+
+def _empty_snapshot() -> Dict:
+    return {"profile": None, "positions": {}, "alerts": {}, "transactions": [], "realized_pnl": []}
+
+async def get_user_snapshot_async(user_id: int, transactions_limit: int = 100) -> Dict:
+    """Get everything stored for a user (GDPR export) in one pipelined round trip.
+    
+    Returns:
+        Dict with profile, positions, alerts, transactions (most recent
+        first) and realized_pnl, decoded like the individual getters
+    """
+    try:
+        position_keys = [key async for key in async_redis_client.scan_iter(match=f"user:{user_id}:positions:*", count=100)]
+        alert_keys = [key async for key in async_redis_client.scan_iter(match=f"user:{user_id}:alerts:*", count=100)]
+        
+        pipe = async_redis_client.pipeline(transaction=False)
+        pipe.get(f"user:{user_id}:profile")
+        pipe.get(f"user:{user_id}:transactions")
+        pipe.get(f"user:{user_id}:realized_pnl")
+        if position_keys:
+            pipe.mget(position_keys)
+        if alert_keys:
+            pipe.mget(alert_keys)
+        replies = await pipe.execute()
+        
+        return _decode_snapshot(position_keys, alert_keys, replies, transactions_limit)
+    except Exception as e:
+        logger.error("Error getting user snapshot: %s", e)
+        return _empty_snapshot()
+
+async def wipe_user_async(user_id: int) -> bool:
+    """Delete all of a user's data (GDPR erasure) in one transaction.
+    
+    Removes the profile, every position and alert, the transaction history
+    and the realized P&L records with a single MULTI/EXEC round trip.
+    
+    Returns:
+        True if the deletion succeeded
+    """
+    try:
+        keys = [
+            f"user:{user_id}:profile",
+            f"user:{user_id}:transactions",
+            f"user:{user_id}:realized_pnl",
+        ]
+        keys.extend([key async for key in async_redis_client.scan_iter(match=f"user:{user_id}:positions:*", count=100)])
+        keys.extend([key async for key in async_redis_client.scan_iter(match=f"user:{user_id}:alerts:*", count=100)])
+        
+        pipe = async_redis_client.pipeline(transaction=True)
+        pipe.delete(*keys)
+        await pipe.execute()
+        
+        logger.info("🗑️ Wiped %s keys for user %s", len(keys), user_id)
+        return True
+    except Exception as e:
+        logger.error("Error wiping user data: %s", e)
+        return False
+
+# Identical /analyze texts within this window reuse one Perplexity answer
+ANALYSIS_CACHE_TTL_SECONDS = 300
+# Upper bound on one analysis; a crashed worker's lock expires after it
+ANALYSIS_LOCK_TTL_SECONDS = 30
+ANALYSIS_POLL_INTERVAL_SECONDS = 0.25
+
+# Delete the lock only if it still holds our token: a compute that outlives
+# ANALYSIS_LOCK_TTL_SECONDS must not release a lock another worker now owns
+_release_analysis_lock = async_redis_client.register_script(
+    "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+)
+
+async def get_or_compute_analysis_async(text: str, compute: Callable[[str], Awaitable[Dict]]) -> Dict:
+    """Sentiment result for text, computed at most once per cache window.
+    
+    The first caller takes a SET NX lock holding a random token and runs
+    compute(text), releasing the lock only while it still holds it; callers
+    arriving meanwhile (other chats, other workers) poll for its result
+    instead of paying for the same API call. Results with confidence 0
+    (the analyzer's error fallback) are not cached. If Redis is unavailable
+    the analysis simply runs uncached.
+    """
+    key = f"analysis:{hashlib.blake2b(text.encode(), digest_size=16).hexdigest()}"
+    lock_key = f"{key}:lock"
+    
+    try:
+        cached = await async_redis_client.get(key)
+        if cached:
+            return orjson.loads(cached)
+        
+        token = secrets.token_hex(16)
+        owner = await async_redis_client.set(lock_key, token, nx=True, ex=ANALYSIS_LOCK_TTL_SECONDS)
+        if not owner:
+            # Someone else is analysing this text: wait for their result
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + ANALYSIS_LOCK_TTL_SECONDS
+            while loop.time() < deadline:
+                await asyncio.sleep(ANALYSIS_POLL_INTERVAL_SECONDS)
+                cached, locked = await async_redis_client.mget(key, lock_key)
+                if cached:
+                    return orjson.loads(cached)
+                if not locked:
+                    break  # Owner failed without caching; analyse ourselves
+    except redis.exceptions.RedisError as e:
+        logger.warning("⚠️ Analysis cache unavailable, running uncached: %s", e)
+        return await compute(text)
+    
+    if not owner:
+        # Outside the try: a failing compute must not be retried as a cache error
+        return await compute(text)
+    
+    try:
+        result = await compute(text)
+        if result.get('confidence'):
+            try:
+                await async_redis_client.set(key, orjson.dumps(result), ex=ANALYSIS_CACHE_TTL_SECONDS)
+            except Exception as e:
+                logger.warning("⚠️ Could not cache analysis: %s", e)
+        return result
+    finally:
+        try:
+            await _release_analysis_lock(keys=[lock_key], args=[token])
+        except Exception as e:
+            logger.warning("⚠️ Could not release analysis lock: %s", e)
+
+async def close_async_client():
+    """Close the async client's pooled connections (app shutdown)."""
+    await async_redis_pool.disconnect()
+
+
 def test_connection() -> bool:
     """Test Redis connection."""
     try:
@@ -472,5 +853,5 @@ def test_connection() -> bool:
         logger.info("✅ Redis connection successful!")
         return True
     except Exception as e:
-        logger.error(f"❌ Redis connection test failed: {e}")
+        logger.error("❌ Redis connection test failed: %s", e)
         return False
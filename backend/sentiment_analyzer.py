@@ -1,8 +1,15 @@
 import os
+import asyncio
 import logging
+import httpx
 import requests
 from dotenv import load_dotenv
 
+try:
+    from backend.http_client import get_http_client
+except ImportError:
+    from http_client import get_http_client
+
 # Load environment variables
 load_dotenv()
 
@@ -13,31 +20,30 @@ logger = logging.getLogger(__name__)
 PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
 PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
 
-def analyze_sentiment(text: str) -> dict:
-    """
-    Analyze sentiment of crypto/trading news using Perplexity API.
+# Max concurrent Perplexity requests from the async handlers (per web worker)
+MAX_CONCURRENT_PERPLEXITY_CALLS = 4
+_perplexity_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PERPLEXITY_CALLS)
+
+# Keep-alive session for the sync analyze_sentiment() (Celery / scripts)
+_session = requests.Session()
+
+def _empty_result(reasoning: str) -> dict:
+    """Build a NEUTRAL result used when no analysis could be produced."""
+    return {
+        'sentiment': 'NEUTRAL',
+        'confidence': 0,
+        'reasoning': reasoning,
+        'key_points': [],
+        'sources': []
+    }
+
+
+def _build_request(text: str) -> tuple:
+    """Build the Perplexity headers and JSON payload for a piece of text.
     
-    Args:
-        text: Article text or news snippet to analyze
-        
     Returns:
-        dict with keys:
-        - sentiment: 'BULLISH', 'BEARISH', or 'NEUTRAL'
-        - confidence: float 0-100
-        - reasoning: str explanation
-        - key_points: list of important points
-        - sources: list of sources (Perplexity bonus!)
+        Tuple (headers, payload)
     """
-    
-    if not text or len(text.strip()) < 10:
-        return {
-            'sentiment': 'NEUTRAL',
-            'confidence': 0,
-            'reasoning': 'Text too short to analyze',
-            'key_points': [],
-            'sources': []
-        }
-    
     # Construct prompt for Perplexity
     prompt = f"""You are a professional crypto/trading sentiment analyst.
 
@@ -83,80 +89,133 @@ Be objective and focus on market impact."""
         "return_images": False
     }
     
+    return headers, payload
+
+
+def _parse_response(data: dict) -> dict:
+    """Extract sentiment, confidence, reasoning and key points from a Perplexity response."""
+    response_text = data['choices'][0]['message']['content']
+    citations = data.get('citations', [])
+    
+    logger.info(f"Perplexity response: {response_text[:200]}...")
+    
+    # Extract sentiment
+    sentiment = 'NEUTRAL'
+    if 'BULLISH' in response_text.upper():
+        sentiment = 'BULLISH'
+    elif 'BEARISH' in response_text.upper():
+        sentiment = 'BEARISH'
+    
+    # Extract confidence
+    confidence = 50
+    for line in response_text.split('\n'):
+        if 'CONFIDENCE:' in line.upper():
+            try:
+                confidence = int(''.join(filter(str.isdigit, line)))
+            except:
+                confidence = 50
+            break
+    
+    # Extract reasoning
+    reasoning = "Analysis completed"
+    for line in response_text.split('\n'):
+        if 'REASONING:' in line.upper():
+            reasoning = line.split(':', 1)[1].strip()
+            break
+    
+    # Extract key points
+    key_points = []
+    in_key_points = False
+    for line in response_text.split('\n'):
+        if 'KEY_POINTS' in line.upper():
+            in_key_points = True
+            continue
+        if in_key_points and line.strip().startswith('-'):
+            key_points.append(line.strip()[1:].strip())
+    
+    result = {
+        'sentiment': sentiment,
+        'confidence': min(confidence, 100),
+        'reasoning': reasoning,
+        'key_points': key_points[:3],
+        'sources': citations[:3]  # Perplexity bonus: real sources!
+    }
+    
+    logger.info(f"Analysis result: {sentiment} ({confidence}%)")
+    return result
+
+
+def analyze_sentiment(text: str) -> dict:
+    """
+    Analyze sentiment of crypto/trading news using Perplexity API.
+    
+    Args:
+        text: Article text or news snippet to analyze
+        
+    Returns:
+        dict with keys:
+        - sentiment: 'BULLISH', 'BEARISH', or 'NEUTRAL'
+        - confidence: float 0-100
+        - reasoning: str explanation
+        - key_points: list of important points
+        - sources: list of sources (Perplexity bonus!)
+    """
+    
+    if not text or len(text.strip()) < 10:
+        return _empty_result('Text too short to analyze')
+    
+    headers, payload = _build_request(text)
+    
     try:
         # Call Perplexity API
-        response = requests.post(PERPLEXITY_API_URL, json=payload, headers=headers)
+        response = _session.post(PERPLEXITY_API_URL, json=payload, headers=headers)
         response.raise_for_status()
         
-        data = response.json()
-        response_text = data['choices'][0]['message']['content']
-        citations = data.get('citations', [])
-        
-        logger.info(f"Perplexity response: {response_text[:200]}...")
+        return _parse_response(response.json())
         
-        # Extract sentiment
-        sentiment = 'NEUTRAL'
-        if 'BULLISH' in response_text.upper():
-            sentiment = 'BULLISH'
-        elif 'BEARISH' in response_text.upper():
-            sentiment = 'BEARISH'
-        
-        # Extract confidence
-        confidence = 50
-        for line in response_text.split('\n'):
-            if 'CONFIDENCE:' in line.upper():
-                try:
-                    confidence = int(''.join(filter(str.isdigit, line)))
-                except:
-                    confidence = 50
-                break
-        
-        # Extract reasoning
-        reasoning = "Analysis completed"
-        for line in response_text.split('\n'):
-            if 'REASONING:' in line.upper():
-                reasoning = line.split(':', 1)[1].strip()
-                break
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error calling Perplexity API: {e}")
+        return _empty_result(f'API Error: {str(e)}')
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return _empty_result(f'Error: {str(e)}')
+
+
+async def analyze_sentiment_async(text: str) -> dict:
+    """
+    Async variant of analyze_sentiment() for the webhook handlers.
+    
+    Uses the shared HTTP client so the Perplexity call does not block the
+    event loop and reuses pooled connections.
+    
+    Args:
+        text: Article text or news snippet to analyze
         
-        # Extract key points
-        key_points = []
-        in_key_points = False
-        for line in response_text.split('\n'):
-            if 'KEY_POINTS' in line.upper():
-                in_key_points = True
-                continue
-            if in_key_points and line.strip().startswith('-'):
-                key_points.append(line.strip()[1:].strip())
+    Returns:
+        Same dict as analyze_sentiment()
+    """
+    
+    if not text or len(text.strip()) < 10:
+        return _empty_result('Text too short to analyze')
+    
+    headers, payload = _build_request(text)
+    
+    try:
+        if _perplexity_semaphore.locked():
+            logger.debug("Perplexity concurrency limit reached, analysis queued")
         
-        result = {
-            'sentiment': sentiment,
-            'confidence': min(confidence, 100),
-            'reasoning': reasoning,
-            'key_points': key_points[:3],
-            'sources': citations[:3]  # Perplexity bonus: real sources!
-        }
+        async with _perplexity_semaphore:
+            response = await get_http_client().post(PERPLEXITY_API_URL, json=payload, headers=headers)
+        response.raise_for_status()
         
-        logger.info(f"Analysis result: {sentiment} ({confidence}%)")
-        return result
+        return _parse_response(response.json())
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error calling Perplexity API: {e}")
-        return {
-            'sentiment': 'NEUTRAL',
-            'confidence': 0,
-            'reasoning': f'API Error: {str(e)}',
-            'key_points': [],
-            'sources': []
-        }
+        return _empty_result(f'API Error: {str(e)}')
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        return {
-            'sentiment': 'NEUTRAL',
-            'confidence': 0,
-            'reasoning': f'Error: {str(e)}',
-            'key_points': [],
-            'sources': []
-        }
+        return _empty_result(f'Error: {str(e)}')
 
 
 class SentimentAnalyzer:
@@ -10,11 +10,19 @@ Provides utilities to send Telegram notifications from Celery tasks:
 
 import os
 import logging
+import threading
+import time
 import requests
 from typing import Optional, List, Dict
 
 logger = logging.getLogger(__name__)
 
+# Broadcasts (morning briefing, alert sweeps) must stay under Telegram's
+# ~30 msg/s per-bot limit, which the webhook's own replies also draw from
+MAX_MESSAGES_PER_SECOND = 20
+# Retries of a send answered with 429 (after waiting retry_after)
+MAX_SEND_RETRIES = 2
+
 
 class TelegramNotificationService:
     """Service for sending Telegram notifications asynchronously."""
@@ -30,6 +38,20 @@ class TelegramNotificationService:
             raise ValueError("TELEGRAM_BOT_TOKEN not provided")
         
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        # Keep-alive session: a task sending many alerts reuses one connection
+        self.session = requests.Session()
+        # Spaces sends across all threads of this process
+        self._send_lock = threading.Lock()
+        self._next_send_at = 0.0
+    
+    def _wait_for_send_slot(self):
+        """Block until this process may send its next message."""
+        with self._send_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_send_at)
+            self._next_send_at = slot + 1 / MAX_MESSAGES_PER_SECOND
+        if slot > now:
+            time.sleep(slot - now)
     
     def send_message(
         self,
@@ -50,16 +72,24 @@ class TelegramNotificationService:
             True if message sent successfully, False otherwise
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/sendMessage",
-                json={
-                    "chat_id": chat_id,
-                    "text": text,
-                    "parse_mode": parse_mode,
-                    "disable_web_page_preview": disable_web_page_preview,
-                },
-                timeout=10,
-            )
+            for attempt in range(MAX_SEND_RETRIES + 1):
+                self._wait_for_send_slot()
+                response = self.session.post(
+                    f"{self.base_url}/sendMessage",
+                    json={
+                        "chat_id": chat_id,
+                        "text": text,
+                        "parse_mode": parse_mode,
+                        "disable_web_page_preview": disable_web_page_preview,
+                    },
+                    timeout=10,
+                )
+                if response.status_code != 429 or attempt == MAX_SEND_RETRIES:
+                    break
+                # Flood control: Telegram says how long to back off
+                retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+                logger.warning(f"Rate limited sending to chat_id={chat_id}, retrying in {retry_after}s")
+                time.sleep(retry_after)
             response.raise_for_status()
             logger.info(f"Message sent successfully to chat_id={chat_id}")
             return True
@@ -14,6 +14,23 @@ from typing import Dict, Optional, List
 
 logger = logging.getLogger(__name__)
 
+# Response parsing runs on every recommendation; compile the patterns once
+_RECOMMENDATION_PATTERNS = [
+    re.compile(r"1\.\s*Recommendation:\s*(BUY|SELL|HOLD)", re.IGNORECASE),  # "1. Recommendation: BUY"
+    re.compile(r"Recommendation:\s*\*\*?(BUY|SELL|HOLD)\*\*?", re.IGNORECASE),  # "Recommendation: **BUY**"
+    re.compile(r"\*\*Recommendation\*\*:\s*(BUY|SELL|HOLD)", re.IGNORECASE),  # "**Recommendation**: BUY"
+    re.compile(r"Action:\s*(BUY|SELL|HOLD)", re.IGNORECASE),  # "Action: BUY"
+]
+_NEGATIVE_CONTEXT_RE = re.compile(r"(?:DON'?T|AVOID|NOT)\s+(?:BUY|SELL)")
+_BUY_RE = re.compile(r'\bBUY\b')
+_SELL_RE = re.compile(r'\bSELL\b')
+_HOLD_RE = re.compile(r'\bHOLD\b')
+_CONFIDENCE_PATTERNS = [
+    re.compile(r"Confidence(?:\s+Score)?:\s*(\d{1,3})", re.IGNORECASE),  # "Confidence: 75" or "Confidence Score: 75"
+    re.compile(r"(\d{1,3})%"),  # "75%"
+    re.compile(r"Score:\s*(\d{1,3})", re.IGNORECASE),  # "Score: 80"
+]
+
 
 class PerplexityClient:
     """Wrapper for Perplexity AI API interactions."""
@@ -33,6 +50,9 @@ class PerplexityClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        # One keep-alive session per client (the client is a singleton), so
+        # repeated calls skip the TCP + TLS handshake to api.perplexity.ai
+        self.session = requests.Session()
     
     def analyze_crypto_sentiment(self, crypto_symbol: str, text: str) -> Dict:
         """Analyze sentiment for a specific crypto from text.
@@ -58,7 +78,7 @@ Focus on factual analysis and avoid speculation.
         """
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/chat/completions",
                 headers=self.headers,
                 json={
@@ -178,7 +198,7 @@ Be objective and avoid recency bias from the last hour's price action.
         """
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/chat/completions",
                 headers=self.headers,
                 json={
@@ -247,42 +267,28 @@ Be objective and avoid recency bias from the last hour's price action.
             'BUY', 'SELL', or 'HOLD'
         """
         # Try structured patterns first (highest priority)
-        patterns = [
-            r"1\.\s*Recommendation:\s*(BUY|SELL|HOLD)",  # "1. Recommendation: BUY"
-            r"Recommendation:\s*\*\*?(BUY|SELL|HOLD)\*\*?",  # "Recommendation: **BUY**"
-            r"\*\*Recommendation\*\*:\s*(BUY|SELL|HOLD)",  # "**Recommendation**: BUY"
-            r"Action:\s*(BUY|SELL|HOLD)",  # "Action: BUY"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        for pattern in _RECOMMENDATION_PATTERNS:
+            match = pattern.search(content)
             if match:
                 rec = match.group(1).upper()
-                logger.debug(f"Extracted recommendation '{rec}' using pattern: {pattern}")
+                logger.debug("Extracted recommendation '%s' using pattern: %s", rec, pattern.pattern)
                 return rec
         
         # Fallback: Look for standalone keywords (less reliable)
         # But avoid false positives like "don't BUY" or "avoid SELL"
         content_upper = content.upper()
         
-        # Check for negative context
-        negative_patterns = [
-            r"DON'?T\s+(BUY|SELL)",
-            r"AVOID\s+(BUY|SELL)",
-            r"NOT\s+(BUY|SELL)",
-        ]
-        
-        for neg_pattern in negative_patterns:
-            if re.search(neg_pattern, content_upper):
-                logger.debug("Found negative context, defaulting to HOLD")
-                return "HOLD"
+        # Check for negative context ("don't BUY", "avoid SELL", "not BUY")
+        if _NEGATIVE_CONTEXT_RE.search(content_upper):
+            logger.debug("Found negative context, defaulting to HOLD")
+            return "HOLD"
         
         # Count occurrences of each action
-        buy_count = len(re.findall(r'\bBUY\b', content_upper))
-        sell_count = len(re.findall(r'\bSELL\b', content_upper))
-        hold_count = len(re.findall(r'\bHOLD\b', content_upper))
+        buy_count = len(_BUY_RE.findall(content_upper))
+        sell_count = len(_SELL_RE.findall(content_upper))
+        hold_count = len(_HOLD_RE.findall(content_upper))
         
-        logger.debug(f"Keyword counts - BUY: {buy_count}, SELL: {sell_count}, HOLD: {hold_count}")
+        logger.debug("Keyword counts - BUY: %s, SELL: %s, HOLD: %s", buy_count, sell_count, hold_count)
         
         # Return most frequent (with BUY/SELL priority over HOLD if tied)
         if buy_count > sell_count and buy_count > hold_count:
@@ -311,19 +317,12 @@ Be objective and avoid recency bias from the last hour's price action.
         Returns:
             Confidence score (0-100), defaults to 60 if not found
         """
-        patterns = [
-            r"Confidence(?:\s+Score)?:\s*(\d{1,3})",  # "Confidence: 75" or "Confidence Score: 75"
-            r"(\d{1,3})%",  # "75%"
-            r"Score:\s*(\d{1,3})",  # "Score: 80"
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
+        for pattern in _CONFIDENCE_PATTERNS:
+            for match in pattern.findall(content):
                 try:
                     confidence = int(match)
                     if 0 <= confidence <= 100:
-                        logger.debug(f"Extracted confidence {confidence}% using pattern: {pattern}")
+                        logger.debug("Extracted confidence %s%% using pattern: %s", confidence, pattern.pattern)
                         return confidence
                 except ValueError:
                     continue
@@ -354,7 +353,7 @@ Keep it concise (under 300 words) and focus on actionable information.
         """
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/chat/completions",
                 headers=self.headers,
                 json={
@@ -9,10 +9,10 @@ Runs daily at 8:00 AM CET via Celery Beat.
 """
 
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 from backend.celery_app import app
 from backend.redis_storage import RedisStorage
-from backend.crypto_prices import get_crypto_price
+from backend.crypto_prices import get_crypto_price, get_multiple_prices
 from backend.services.perplexity_client import get_perplexity_client
 from backend.services.notification_service import get_notification_service
 
@@ -55,12 +55,16 @@ def generate_daily_recommendations() -> Dict:
                     logger.debug(f"User {chat_id} has no portfolio, skipping")
                     continue
                 
+                # One batched price lookup for the whole portfolio
+                prices = get_multiple_prices(list(portfolio))
+                
                 # Generate recommendations for each position
                 for symbol, position in portfolio.items():
                     recommendation = generate_position_recommendation(
                         symbol=symbol,
                         position=position,
                         perplexity=perplexity,
+                        current_price=prices.get(symbol.upper()),
                     )
                     
                     if recommendation and recommendation["confidence"] >= MIN_CONFIDENCE_THRESHOLD:
@@ -108,6 +112,7 @@ def generate_position_recommendation(
     symbol: str,
     position: Dict,
     perplexity,
+    current_price: Optional[float] = None,
 ) -> Dict | None:
     """Generate AI recommendation for a single position.
     
@@ -115,13 +120,15 @@ def generate_position_recommendation(
         symbol: Crypto symbol (e.g., 'BTC')
         position: Position data dict
         perplexity: Perplexity client instance
+        current_price: Prefetched price (fetched here if not given)
     
     Returns:
         Dict with recommendation, reasoning, confidence or None if error
     """
     try:
         # Get current price
-        current_price = get_crypto_price(symbol)
+        if current_price is None:
+            current_price = get_crypto_price(symbol)
         if not current_price:
             logger.warning(f"Could not fetch price for {symbol}")
             return None
@@ -8,10 +8,10 @@ Runs every 15 minutes via Celery Beat.
 """
 
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from backend.celery_app import app
 from backend.redis_storage import RedisStorage
-from backend.crypto_prices import get_crypto_price
+from backend.crypto_prices import get_crypto_price, get_multiple_prices
 from backend.services.notification_service import get_notification_service
 
 logger = logging.getLogger(__name__)
@@ -38,19 +38,23 @@ def check_all_price_alerts() -> Dict:
     errors = 0
     
     try:
-        # Get all user IDs from Redis
-        user_ids = storage.get_all_user_ids()
-        logger.info(f"Found {len(user_ids)} users to check")
+        # Every user's positions in one Redis sweep
+        try:
+            portfolios = storage.get_all_portfolios()
+        except Exception as e:
+            # Reported as an error, not as "0 users"
+            logger.error(f"[TASK] Could not load portfolios: {e}")
+            errors += 1
+            portfolios = {}
+        logger.info(f"Found {len(portfolios)} users with positions to check")
         
-        for user_id in user_ids:
+        # One CoinGecko call for every distinct symbol held by anyone
+        symbols = {symbol for portfolio in portfolios.values() for symbol in portfolio}
+        prices = get_multiple_prices(list(symbols)) if symbols else {}
+        
+        for chat_id, portfolio in portfolios.items():
             try:
                 users_checked += 1
-                chat_id = int(user_id.replace("user:", ""))
-                
-                # Get user's portfolio
-                portfolio = storage.get_portfolio(chat_id)
-                if not portfolio:
-                    continue
                 
                 # Check each position
                 for symbol, position in portfolio.items():
@@ -59,13 +63,14 @@ def check_all_price_alerts() -> Dict:
                         symbol=symbol,
                         position=position,
                         notification_service=notification_service,
+                        current_price=prices.get(symbol.upper()),
                     )
                     
                     if alert_triggered:
                         alerts_sent += 1
             
             except Exception as e:
-                logger.error(f"Error checking user {user_id}: {e}")
+                logger.error(f"Error checking user {chat_id}: {e}")
                 errors += 1
         
         result = {
@@ -93,6 +98,7 @@ def check_position_alert(
     symbol: str,
     position: Dict,
     notification_service,
+    current_price: Optional[float] = None,
 ) -> bool:
     """Check if a position triggers an alert and send notification.
     
@@ -101,13 +107,15 @@ def check_position_alert(
         symbol: Crypto symbol (e.g., 'BTC')
         position: Position data dict
         notification_service: Notification service instance
+        current_price: Prefetched price (fetched here if not given)
     
     Returns:
         True if alert was sent
     """
     try:
         # Get current price
-        current_price = get_crypto_price(symbol)
+        if current_price is None:
+            current_price = get_crypto_price(symbol)
         if not current_price:
             logger.warning(f"Could not fetch price for {symbol}")
             return False
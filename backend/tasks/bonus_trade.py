@@ -135,9 +135,7 @@ def send_bonus_trade_of_day() -> Dict:
         return result
     
     except Exception as e:
-        logger.error(f"[BONUS TRADE] Task failed: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception(f"[BONUS TRADE] Task failed: {e}")
         return {
             "status": "failed",
             "error": str(e),
@@ -11,10 +11,10 @@ Runs daily at 8:00 AM CET via Celery Beat.
 """
 
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from backend.celery_app import app
 from backend.redis_storage import RedisStorage
-from backend.crypto_prices import get_crypto_price
+from backend.crypto_prices import get_crypto_price, get_multiple_prices
 from backend.services.perplexity_client import get_perplexity_client
 from backend.services.notification_service import get_notification_service
 
@@ -75,7 +75,9 @@ def send_daily_portfolio_insights() -> Dict:
                 
                 # Calculate portfolio metrics
                 logger.debug(f"[DAILY INSIGHTS] Calculating metrics for user {chat_id}...")
-                metrics = calculate_portfolio_metrics(portfolio)
+                # One batched price lookup shared by the metrics and the advice
+                prices = get_multiple_prices(list(portfolio))
+                metrics = calculate_portfolio_metrics(portfolio, prices)
                 
                 if not metrics:
                     logger.warning(
@@ -102,7 +104,7 @@ def send_daily_portfolio_insights() -> Dict:
                 # Generate AI advice for each position
                 logger.debug(f"[DAILY INSIGHTS] Generating AI advice for user {chat_id}...")
                 try:
-                    position_advice = generate_position_advice(portfolio, perplexity)
+                    position_advice = generate_position_advice(portfolio, perplexity, prices)
                     logger.debug(f"[DAILY INSIGHTS] Generated {len(position_advice)} advice items")
                 except Exception as e:
                     logger.error(f"[DAILY INSIGHTS] Advice generation failed for user {chat_id}: {e}")
@@ -163,11 +165,19 @@ def send_daily_portfolio_insights() -> Dict:
         }
 
 
-def calculate_portfolio_metrics(portfolio: Dict) -> Dict | None:
+def _position_price(symbol: str, prices: Optional[Dict[str, float]]) -> Optional[float]:
+    """Price from the prefetched batch, or a single lookup without one."""
+    if prices is None:
+        return get_crypto_price(symbol)
+    return prices.get(symbol.upper())
+
+
+def calculate_portfolio_metrics(portfolio: Dict, prices: Optional[Dict[str, float]] = None) -> Dict | None:
     """Calculate portfolio performance metrics.
     
     Args:
         portfolio: User's portfolio dict
+        prices: Prefetched {symbol: price} (fetched per symbol if not given)
     
     Returns:
         Dict with total_value, change_24h, best_performer, etc. or None if error
@@ -182,7 +192,7 @@ def calculate_portfolio_metrics(portfolio: Dict) -> Dict | None:
         
         for symbol, position in portfolio.items():
             # Get current price
-            current_price = get_crypto_price(symbol)
+            current_price = _position_price(symbol, prices)
             if not current_price:
                 logger.warning(f"Could not fetch price for {symbol}, skipping position")
                 continue
@@ -233,12 +243,13 @@ def calculate_portfolio_metrics(portfolio: Dict) -> Dict | None:
         return None
 
 
-def generate_position_advice(portfolio: Dict, perplexity) -> List[Dict]:
+def generate_position_advice(portfolio: Dict, perplexity, prices: Optional[Dict[str, float]] = None) -> List[Dict]:
     """Generate AI-powered advice for each portfolio position.
     
     Args:
         portfolio: User's portfolio dict
         perplexity: Perplexity client instance
+        prices: Prefetched {symbol: price} (fetched per symbol if not given)
     
     Returns:
         List of dicts with symbol, pnl_pct, and advice
@@ -249,7 +260,7 @@ def generate_position_advice(portfolio: Dict, perplexity) -> List[Dict]:
         for symbol, position in portfolio.items():
             try:
                 # Get current price
-                current_price = get_crypto_price(symbol)
+                current_price = _position_price(symbol, prices)
                 if not current_price:
                     logger.warning(f"Skipping advice for {symbol}: price unavailable")
                     continue
@@ -35,6 +35,6 @@ echo "🤖 Starting Telegram bot with FastAPI..."
 echo "========================================"
 echo ""
 
-# Start uvicorn
+# Start gunicorn (uvicorn workers, see backend/gunicorn_conf.py)
 cd /app
-exec python -m uvicorn backend.bot_webhook:app --host 0.0.0.0 --port 8080
+exec python -m gunicorn -c backend/gunicorn_conf.py backend.bot_webhook:app
@@ -0,0 +1,6 @@
+"""Shared pytest setup."""
+import os
+
+# redis_storage refuses to import without REDIS_URL; the clients connect
+# lazily, so no server is needed for tests that never touch Redis
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
@@ -0,0 +1,223 @@
+"""Tests for command dispatch, argument parsing and reply caching in the webhook bot."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+pytest.importorskip("telegram")
+pytest.importorskip("fastapi")
+pytest.importorskip("dotenv")
+pytest.importorskip("redis")
+pytest.importorskip("httpx")
+pytest.importorskip("requests")
+pytest.importorskip("cachetools")
+
+from backend import bot_webhook
+
+BOT_USERNAME = "SentimentBot"
+USER_ID = 42
+
+
+def make_update(text):
+    message = SimpleNamespace(text=text, reply_text=AsyncMock())
+    return SimpleNamespace(
+        effective_message=message,
+        message=message,
+        effective_user=SimpleNamespace(id=USER_ID),
+    )
+
+
+def make_context():
+    return SimpleNamespace(bot=SimpleNamespace(username=BOT_USERNAME), args=None)
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Swap the dispatched callbacks for mocks, with the database online."""
+    monkeypatch.setattr(bot_webhook, "DB_AVAILABLE", True)
+    monkeypatch.setattr(bot_webhook, "ANALYTICS_AVAILABLE", False)
+    mocks = {}
+    for command in ("portfolio", "add", "analyze"):
+        mocks[command] = AsyncMock()
+        monkeypatch.setitem(bot_webhook._COMMAND_DISPATCH, command, mocks[command])
+    return mocks
+
+
+def dispatch(text):
+    update, context = make_update(text), make_context()
+    asyncio.run(bot_webhook.dispatch_command(update, context))
+    return update, context
+
+
+# dispatch_command
+
+def test_dispatch_routes_command_with_args(handlers):
+    update, context = dispatch("/add BTC 0.5 45000")
+
+    handlers["add"].assert_awaited_once_with(update, context)
+    assert context.args == ["BTC", "0.5", "45000"]
+
+
+def test_dispatch_without_args_sets_empty_list(handlers):
+    _, context = dispatch("/portfolio")
+
+    handlers["portfolio"].assert_awaited_once()
+    assert context.args == []
+
+
+def test_dispatch_collapses_extra_whitespace(handlers):
+    _, context = dispatch("/add  BTC   0.5 45000 ")
+
+    assert context.args == ["BTC", "0.5", "45000"]
+
+
+def test_dispatch_command_is_case_insensitive(handlers):
+    dispatch("/PORTFOLIO")
+
+    handlers["portfolio"].assert_awaited_once()
+
+
+@pytest.mark.parametrize("target", [BOT_USERNAME, BOT_USERNAME.lower()])
+def test_dispatch_accepts_own_bot_mention(handlers, target):
+    _, context = dispatch(f"/add@{target} ETH 10 2500")
+
+    handlers["add"].assert_awaited_once()
+    assert context.args == ["ETH", "10", "2500"]
+
+
+def test_dispatch_ignores_command_for_other_bot(handlers):
+    update, context = dispatch("/add@OtherBot ETH 10 2500")
+
+    handlers["add"].assert_not_awaited()
+    update.message.reply_text.assert_not_awaited()
+    assert context.args is None
+
+
+def test_dispatch_ignores_unknown_command(handlers):
+    update, _ = dispatch("/doesnotexist")
+
+    for handler in handlers.values():
+        handler.assert_not_awaited()
+    update.message.reply_text.assert_not_awaited()
+
+
+def test_dispatch_answers_db_commands_while_db_offline(handlers, monkeypatch):
+    track_command = Mock()
+    monkeypatch.setattr(bot_webhook, "DB_AVAILABLE", False)
+    monkeypatch.setattr(bot_webhook, "ANALYTICS_AVAILABLE", True)
+    monkeypatch.setattr(bot_webhook, "track_command", track_command, raising=False)
+
+    update, _ = dispatch("/portfolio")
+
+    assert "portfolio" in bot_webhook._DB_COMMANDS
+    handlers["portfolio"].assert_not_awaited()
+    update.message.reply_text.assert_awaited_once()
+    assert update.message.reply_text.await_args.args[0] == bot_webhook._DB_OFFLINE_MSG
+    track_command.assert_called_once_with("portfolio", USER_ID, success=False, error="db_offline")
+
+
+def test_dispatch_runs_non_db_commands_while_db_offline(handlers, monkeypatch):
+    monkeypatch.setattr(bot_webhook, "DB_AVAILABLE", False)
+
+    update, _ = dispatch("/analyze BTC to the moon")
+
+    assert "analyze" not in bot_webhook._DB_COMMANDS
+    handlers["analyze"].assert_awaited_once()
+    update.message.reply_text.assert_not_awaited()
+
+
+# _parse_trade_args (/add and /sell)
+
+def parse(args, usage):
+    message = SimpleNamespace(reply_text=AsyncMock())
+    result = asyncio.run(bot_webhook._parse_trade_args(message, args, usage))
+    return result, message.reply_text
+
+
+@pytest.fixture(params=["_ADD_USAGE", "_SELL_USAGE"])
+def usage(request):
+    return getattr(bot_webhook, request.param)
+
+
+def test_parse_trade_args_valid(usage):
+    result, reply = parse(["btc", "0.5", "45000"], usage)
+
+    assert result == ("BTC", 0.5, 45000.0)
+    reply.assert_not_awaited()
+
+
+@pytest.mark.parametrize("args", [[], ["BTC"], ["BTC", "0.5"], ["BTC", "0.5", "45000", "extra"]])
+def test_parse_trade_args_wrong_count_replies_usage(usage, args):
+    result, reply = parse(args, usage)
+
+    assert result is None
+    reply.assert_awaited_once()
+    assert reply.await_args.args[0] == usage
+
+
+@pytest.mark.parametrize("args", [["BTC", "half", "45000"], ["BTC", "0.5", "$45000"]])
+def test_parse_trade_args_rejects_non_numbers(usage, args):
+    result, reply = parse(args, usage)
+
+    assert result is None
+    assert reply.await_args.args[0] == "❌ Quantity and price must be numbers."
+
+
+@pytest.mark.parametrize("args", [["BTC", "0", "45000"], ["BTC", "0.5", "-1"]])
+def test_parse_trade_args_rejects_non_positive(usage, args):
+    result, reply = parse(args, usage)
+
+    assert result is None
+    assert reply.await_args.args[0] == "❌ Values must be positive."
+
+
+# /portfolio reply cache
+
+def make_position(current_price):
+    return {
+        "quantity": 0.5, "avg_price": 45000.0, "current_price": current_price,
+        "current_value": 0.5 * (current_price or 0), "pnl_usd": 0.0, "pnl_percent": 0.0,
+    }
+
+
+@pytest.fixture
+def portfolio_env(monkeypatch):
+    """Empty reply cache, analytics on, and a stubbed priced portfolio."""
+    track_command = Mock()
+    monkeypatch.setattr(bot_webhook, "_reply_cache", {})
+    monkeypatch.setattr(bot_webhook, "ANALYTICS_AVAILABLE", True)
+    monkeypatch.setattr(bot_webhook, "track_command", track_command, raising=False)
+    get_portfolio = AsyncMock()
+    monkeypatch.setattr(bot_webhook.portfolio_manager, "get_portfolio_with_prices_async", get_portfolio)
+    return get_portfolio, track_command
+
+
+def run_portfolio():
+    update = make_update("/portfolio")
+    update.effective_user = SimpleNamespace(id=USER_ID, username="alice", first_name="Alice")
+    asyncio.run(bot_webhook.portfolio_command(update, make_context()))
+    return update
+
+
+def test_portfolio_cache_hit_is_tracked(portfolio_env):
+    get_portfolio, track_command = portfolio_env
+    get_portfolio.return_value = {"positions": {"BTC": make_position(60000.0)}, "total_current_value": 30000.0}
+
+    run_portfolio()
+    update = run_portfolio()
+
+    get_portfolio.assert_awaited_once()
+    update.message.reply_text.assert_awaited_once()
+    assert track_command.call_count == 2
+
+
+def test_portfolio_with_missing_price_is_not_cached(portfolio_env):
+    get_portfolio, _ = portfolio_env
+    get_portfolio.return_value = {"positions": {"BTC": make_position(None)}, "total_current_value": 0.0}
+
+    run_portfolio()
+    run_portfolio()
+
+    assert get_portfolio.await_count == 2
+    assert (USER_ID, "portfolio") not in bot_webhook._reply_cache
@@ -0,0 +1,57 @@
+"""Tests for packing /recommend replies into Telegram messages."""
+import pytest
+
+pytest.importorskip("telegram")
+pytest.importorskip("redis")
+pytest.importorskip("httpx")
+pytest.importorskip("cachetools")
+
+from backend.recommend_handler import (
+    TELEGRAM_MAX_MESSAGE_LENGTH,
+    _RECOMMENDATION_SEPARATOR,
+    pack_messages,
+)
+
+
+def test_pack_messages_joins_texts_that_fit():
+    assert pack_messages(["a", "b", "c"]) == [
+        f"a{_RECOMMENDATION_SEPARATOR}b{_RECOMMENDATION_SEPARATOR}c"
+    ]
+
+
+def test_pack_messages_empty():
+    assert pack_messages([]) == []
+
+
+def test_pack_messages_fills_up_to_the_limit():
+    half = (TELEGRAM_MAX_MESSAGE_LENGTH - len(_RECOMMENDATION_SEPARATOR)) // 2
+    texts = ["a" * half, "b" * half]
+
+    packed = pack_messages(texts)
+
+    assert packed == [_RECOMMENDATION_SEPARATOR.join(texts)]
+    assert len(packed[0]) == TELEGRAM_MAX_MESSAGE_LENGTH
+
+
+def test_pack_messages_counts_utf16_code_units():
+    # Same code point count as the test above, but each emoji is a surrogate
+    # pair: 2 UTF-16 units, so the joined text would be over Telegram's limit
+    half = (TELEGRAM_MAX_MESSAGE_LENGTH - len(_RECOMMENDATION_SEPARATOR)) // 2
+    texts = ["🚀" * half, "📉" * half]
+
+    assert pack_messages(texts) == texts
+
+
+def test_pack_messages_keeps_oversized_text_whole():
+    big = "x" * (TELEGRAM_MAX_MESSAGE_LENGTH + 1)
+
+    assert pack_messages(["a", big, "b"]) == ["a", big, "b"]
+
+
+def test_pack_messages_starts_new_message_at_text_boundary():
+    chunk = "y" * 3000
+
+    assert pack_messages([chunk, chunk, "z"]) == [
+        chunk,
+        f"{chunk}{_RECOMMENDATION_SEPARATOR}z",
+    ]